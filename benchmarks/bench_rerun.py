@@ -0,0 +1,203 @@
+# Measures the server cost of the interactions of interview_app.py, on a live `streamlit run` server.
+# The benchmark talks to the server like a browser does (the websocket protocol of Streamlit) and sends, for each
+# interaction, what the browser sends: nothing for a widget in a form (it is sent on submit), a rerun of the panel
+# (fragment) the widget is in, or a rerun of the whole script. Each interaction is compared with a rerun of the whole
+# page, which is what every interaction cost before the form and the fragments.
+#
+# The interactions: editing the job description on the setup page, editing an answer, and the polling of the results
+# and of the feedback pages while the feedback is pending. The interview pages are opened from sessions written to the
+# session store of the server beforehand. The feedback requests go to the local fake OpenAI server, slow enough for the
+# feedback to stay pending.
+#
+# Reported per interaction: the script runs it triggers, the round trip (request to end of the script run, median and
+# p95) and the CPU time of the server process (Linux only, read from /proc).
+# Options after -- are passed to `streamlit run`, e.g. -- --runner.postScriptGC false: Streamlit runs a full garbage
+# collection after every script run, fragment runs included, and it is most of the server CPU of a rerun.
+# --app measures another version of the app, e.g. the one before the fragments:
+#     git worktree add /tmp/before 2a348e0 && python benchmarks/bench_rerun.py --app /tmp/before/interview_app.py
+#
+# Usage: python benchmarks/bench_rerun.py [--reruns 50] [--app interview_app.py] [--port 8599]
+import argparse
+import contextlib
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import urllib.request
+from time import perf_counter, sleep
+from typing import Dict, List, Optional
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.sync.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from session_store import SQLiteSessionStore
+
+QUESTIONS = ["Tell me about a project you are proud of.", "How do you handle a disagreement with a colleague?",
+    "How would you design a rate limiter?", "Explain how a database index works.", "How do you debug a memory leak?"]
+ANSWERS = ["I led the migration of our billing service to a new database. I planned it in three steps, tested each one "
+    f"on a copy of the production data, and we cut the incidents by half. (answer {i + 1})" for i in range(len(QUESTIONS))]
+
+# The interview pages, as stored in the session store
+def interview_state(**fields) -> Dict:
+    state = {"step": 1, "job_title": "Data Engineer", "job_description": "", "question_count": len(QUESTIONS),
+        "difficulty_level": "Medium", "openai_model": "gpt-4o-mini", "questions": QUESTIONS, "answers": [""] * len(QUESTIONS),
+        "answer_feedback": [], "finished": False, "show_results": False, "total_cost": 0.0, "usage_by_mode": {},
+        "question_timing": {}, "questions_fallback": False}
+    return dict(state, **fields)
+
+SESSIONS = {
+    "answer": interview_state(),
+    "results": interview_state(step=len(QUESTIONS), answers=ANSWERS, finished=True),
+    "feedback": interview_state(answers=ANSWERS, finished=True, show_results=True),
+}
+
+def server_cpu_seconds(pid: int) -> Optional[float]:
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except OSError:
+        return None
+
+def wait_for(url: str, process: subprocess.Popen):
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(url, timeout=1)
+            return
+        except OSError:
+            if process.poll() is not None:
+                break
+            sleep(0.1)
+    raise RuntimeError(f"The server of {url} did not start")
+
+# One browser session: the widgets and fragments of the last script run, and the reruns it requests
+class BrowserSession:
+    def __init__(self, websocket, query_string: str):
+        self.websocket = websocket
+        self.query_string = query_string
+        self.widgets: Dict[str, Dict] = {}          # widget key -> {"id", "form_id", "fragment_id"}
+        self.polling_fragments: List[str] = []      # fragments rerun by the browser every few seconds (run_every)
+
+    # Requests a rerun (of the fragment, if any) and waits for its end. Returns the round trip in seconds.
+    def rerun(self, widget_states: Dict[str, str] = {}, fragment_id: str = "", auto_rerun: bool = False) -> float:
+        message = BackMsg()
+        message.rerun_script.query_string = self.query_string
+        message.rerun_script.fragment_id = fragment_id
+        message.rerun_script.is_auto_rerun = auto_rerun
+        for widget_id, value in widget_states.items():
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            state.string_value = value
+        start = perf_counter()
+        self.websocket.send(message.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.websocket.recv())
+            kind = forward.WhichOneof("type")
+            if kind == "script_finished":
+                return perf_counter() - start
+            if kind == "auto_rerun" and forward.auto_rerun.fragment_id not in self.polling_fragments:
+                self.polling_fragments.append(forward.auto_rerun.fragment_id)
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    raise RuntimeError(f"The app failed: {element.exception.message}")
+                widget_id = getattr(getattr(element, element_type), "id", "")
+                if widget_id.startswith("$$ID-"):
+                    self.widgets[widget_id.split("-", 2)[2]] = {"id": widget_id,
+                        "form_id": getattr(getattr(element, element_type), "form_id", ""), "fragment_id": forward.delta.fragment_id}
+
+@contextlib.contextmanager
+def browser_session(port: int, query_string: str):
+    with connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None) as websocket:
+        session = BrowserSession(websocket, query_string)
+        session.rerun()     # First page load, not measured
+        yield session
+
+# Repeats the rerun and returns the round trips and the server CPU time per rerun
+def time_reruns(pid: int, rerun_count: int, rerun) -> Dict:
+    durations = []
+    cpu_start = server_cpu_seconds(pid)
+    for i in range(rerun_count):
+        durations.append(rerun(i))
+    cpu_end = server_cpu_seconds(pid)
+    return {"durations": durations, "cpu": (cpu_end - cpu_start) / rerun_count if cpu_start is not None else None}
+
+def milliseconds(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:7.2f} ms" if seconds is not None else "      -   "
+
+def report(name: str, runs: str, times: Optional[Dict]):
+    if times is None:
+        print(f"{name:<26} {runs:<14}")
+        return
+    durations = sorted(times["durations"])
+    p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+    print(f"{name:<26} {runs:<14} round trip {milliseconds(statistics.median(durations))}   p95 {milliseconds(p95)}   "
+        f"server CPU {milliseconds(times['cpu'])}")
+
+# The rerun a browser sends when the widget changes: none in a form, the fragment of the widget, or the whole script
+def widget_interaction(pid: int, session: BrowserSession, key: str, values: List[str], rerun_count: int):
+    widget = session.widgets[key]
+    if widget["form_id"]:
+        return "none (form)", None
+    runs = "panel" if widget["fragment_id"] else "whole script"
+    return runs, time_reruns(pid, rerun_count,
+        lambda i: session.rerun({widget["id"]: values[i % len(values)]}, widget["fragment_id"]))
+
+def polling(pid: int, session: BrowserSession, rerun_count: int):
+    if not session.polling_fragments:
+        return "none", None
+    return "panel", time_reruns(pid, rerun_count, lambda i: session.rerun(fragment_id=session.polling_fragments[0], auto_rerun=True))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the server cost of the interactions of the app.")
+    parser.add_argument("--reruns", type=int, default=50, help="Reruns per interaction")
+    parser.add_argument("--app", default=os.path.join(ROOT, "interview_app.py"), help="App script to measure")
+    parser.add_argument("--port", type=int, default=8599, help="Port of the Streamlit server (the fake OpenAI server uses the next one)")
+    parser.add_argument("streamlit_options", nargs="*", help="Options of `streamlit run`, after --, e.g. -- --runner.postScriptGC false")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_rerun_")     # The session store and the caches of the server
+    store = SQLiteSessionStore(os.path.join(work_dir, ".sessions.sqlite3"), 3600)
+    for page, state in SESSIONS.items():
+        store.save(f"bench-{page}", state)
+
+    # The feedback requests take a minute: the feedback stays pending, and the pages keep polling
+    fake_server = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "fake_openai_server.py"),
+        "--port", str(args.port + 1), "--latency", "60", "--jitter", "0", "--error-rate", "0"], stdout=subprocess.DEVNULL)
+    env = dict(os.environ, OPENAI_API_KEY="sk-benchmark", OPENAI_BASE_URL=f"http://127.0.0.1:{args.port + 1}/v1",
+        INTERVIEW_LLM_MODE="live")
+    server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", os.path.abspath(args.app), "--server.headless", "true",
+        "--server.port", str(args.port), "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none", *args.streamlit_options],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(f"http://127.0.0.1:{args.port + 1}/reset", fake_server)
+        wait_for(f"http://127.0.0.1:{args.port}/_stcore/health", server)
+        print(f"{args.app}, {args.reruns} reruns per interaction")
+
+        with browser_session(args.port, "") as session:     # Includes the cold start of the app
+            report("setup page: full rerun", "whole script", time_reruns(server.pid, args.reruns, lambda i: session.rerun()))
+            report("setup page: edit", *widget_interaction(server.pid, session, "input_job_description",
+                ["A backend role on the payments team.", "A data role on the analytics team."], args.reruns))
+
+        with browser_session(args.port, "session=bench-answer") as session:
+            report("answer page: full rerun", "whole script", time_reruns(server.pid, args.reruns, lambda i: session.rerun()))
+            report("answer page: edit", *widget_interaction(server.pid, session, "ans_0", ANSWERS[:2], args.reruns))
+
+        for page in ("results", "feedback"):
+            with browser_session(args.port, f"session=bench-{page}") as session:
+                report(f"{page} page: full rerun", "whole script", time_reruns(server.pid, args.reruns, lambda i: session.rerun()))
+                report(f"{page} page: polling", *polling(server.pid, session, args.reruns))
+    finally:
+        server.terminate()
+        fake_server.terminate()
+        server.wait()
+        fake_server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Micro-benchmark of the answer validation on 1,500 character answers.
+# Compares the previous implementation (regex + one scan per keyword + better_profanity)
+# with the precompiled InputValidator, without and with the memo.
+#
+# Usage: python benchmarks/bench_validation.py [answer_count]
+import os
+import random
+import re
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from input_validation import BANNED_KEYWORDS, InputValidator, read_profanity_wordlist
+
+WORDS = ("the project team database query performance improved result migration billing system "
+    "customer requirements deadline architecture refactoring testing deployment latency throughput "
+    "I we led designed implemented measured reduced increased by percent weeks stakeholders").split()
+
+def make_answer(length: int = 1500) -> str:
+    words = []
+    while sum(len(word) + 1 for word in words) < length:
+        words.append(random.choice(WORDS))
+    return (" ".join(words)[:length - 1]).strip() + "."
+
+def legacy_validation(input_str: str) -> str:
+    from better_profanity import profanity
+
+    text = input_str.strip()
+    if not re.match(r"^[\w\s.,!?;:()'\-&%“”\"\/]+$", text, flags=re.UNICODE):
+        return "Should contain letters, digits, punctuation, spaces only"
+    lower_text = text.lower()
+    for keyword in BANNED_KEYWORDS:
+        if keyword in lower_text:
+            return "Contains disallowed keywords"
+    if profanity.contains_profanity(input_str):
+        return "Contains profanity"
+    return ""
+
+def measure(name: str, validate, answers) -> float:
+    start = perf_counter()
+    for answer in answers:
+        validate(answer)
+    elapsed = perf_counter() - start
+    print(f"{name:<32} {len(answers) / elapsed:>12,.0f} answers/s   {elapsed / len(answers) * 1e6:>10,.1f} us/answer")
+    return elapsed
+
+def main():
+    random.seed(42)
+    answer_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    answers = [make_answer() for _ in range(answer_count)]
+
+    start = perf_counter()
+    validator = InputValidator(BANNED_KEYWORDS, read_profanity_wordlist())
+    print(f"InputValidator built in {(perf_counter() - start) * 1000:.1f} ms")
+
+    legacy_validation(answers[0])  # Load the better_profanity wordlist before measuring
+    legacy = measure("legacy", legacy_validation, answers)
+    compiled = measure("InputValidator (no memo)", validator.validate_text_uncached, answers)
+    measure("validate_many (fills the memo)", lambda answer: validator.validate_many([answer]), answers)
+    memoized = measure("InputValidator (memo hit)", validator.validate_text, answers)
+    print(f"speedup: {legacy / compiled:.1f}x without memo, {legacy / memoized:.0f}x on reruns with unchanged text")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# Checks that the prompts start with a static prefix, identical for every input, so OpenAI can cache it.
+# The previous layout (variable question/answer first, static instructions last) is measured for comparison.
+# With --requests N, N feedback requests are also sent with each layout, and the latency, the cached input tokens
+# and the cost are compared. This needs OPENAI_API_KEY (and optionally OPENAI_BASE_URL).
+# OpenAI only caches prompts of 1024 tokens or more, in 128 token increments.
+#
+# Usage: python benchmarks/check_prompt_prefix.py [--requests N] [--model gpt-4.1-nano]
+import argparse
+import os
+import statistics
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from interview_config import DEFAULT_ANSWERS, DEFAULT_QUESTIONS, openai_price_per_1m_tokens
+from instrumentation import usage_cost, usage_tokens
+from prompts import (FEEDBACK_CACHE_KEY, FEEDBACK_INSTRUCTIONS, FEEDBACK_SYSTEM_PROMPT, feedback_batch_prompt,
+    feedback_prompt, questions_prompt, triage_prompt)
+
+# Same text as feedback_prompt(), in the previous order: question and answer first, then the static instructions
+def legacy_feedback_prompt(question: str, answer: str) -> list:
+    role, logic_flow = FEEDBACK_INSTRUCTIONS.split("\n\n", 1)
+    output_format = FEEDBACK_SYSTEM_PROMPT[FEEDBACK_SYSTEM_PROMPT.index("<output_format>"):]
+    return [
+        {"role": "system", "content": role},
+        {"role": "user", "content": f"""<context>
+    <question>{question}</question>
+    <answer>{answer}</answer>
+</context>
+
+{logic_flow}
+{output_format}"""}
+    ]
+
+def prompt_text(messages: list) -> str:
+    return "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+
+def common_prefix_length(texts: list) -> int:
+    return len(os.path.commonprefix(texts))
+
+def check_prefixes() -> bool:
+    pairs = list(zip(DEFAULT_QUESTIONS, DEFAULT_ANSWERS))
+    ok = True
+    checks = [
+        ("questions", [questions_prompt(title, count, level, description) for title, count, level, description in
+            [("Data Engineer", 5, "Easy", ""), ("Software Developer", 8, "Hard", "Python, SQL"), ("QA Lead", 3, "Medium", "")]]),
+        ("per_question", [feedback_prompt(q, a) for q, a in pairs]),
+        ("batched", [feedback_batch_prompt(pairs[:2]), feedback_batch_prompt(pairs[1:]), feedback_batch_prompt(pairs)]),
+        ("triage", [triage_prompt(pairs[:1]), triage_prompt(pairs[1:]), triage_prompt(pairs)]),
+    ]
+    for kind, prompts in checks:
+        identical = len({prompt[0]["content"] for prompt in prompts}) == 1
+        ok = ok and identical
+        prefix = common_prefix_length([prompt_text(prompt) for prompt in prompts])
+        print(f"{kind:<14} system message identical: {identical!s:<5}   shared prefix {prefix:>6,} chars (~{prefix // 4:,} tokens)")
+
+    legacy = common_prefix_length([prompt_text(legacy_feedback_prompt(q, a)) for q, a in pairs])
+    print(f"{'legacy':<14} shared prefix {legacy:>6,} chars (~{legacy // 4:,} tokens)")
+    return ok
+
+def send_requests(build_prompt, request_count: int, model: str) -> dict:
+    from openai import OpenAI
+    client = OpenAI()
+    pairs = list(zip(DEFAULT_QUESTIONS, DEFAULT_ANSWERS))
+    latencies, cached, costs = [], [], []
+    for i in range(request_count):
+        q, a = pairs[i % len(pairs)]
+        start = perf_counter()
+        response = client.responses.create(model=model, input=build_prompt(q, a), max_output_tokens=400,
+            prompt_cache_key=FEEDBACK_CACHE_KEY)
+        latencies.append(perf_counter() - start)
+        tokens = usage_tokens(response.usage)
+        cached.append(tokens["cached"] / max(1, tokens["input"]))
+        costs.append(usage_cost(tokens, openai_price_per_1m_tokens[model]))
+    return {"latency": statistics.median(latencies), "cached": statistics.mean(cached), "cost": statistics.mean(costs)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=0)
+    parser.add_argument("--model", default="gpt-4.1-nano")
+    args = parser.parse_args()
+
+    ok = check_prefixes()
+    if args.requests:
+        results = {name: send_requests(build_prompt, args.requests, args.model)
+            for name, build_prompt in [("legacy", legacy_feedback_prompt), ("static prefix", feedback_prompt)]}
+        for name, result in results.items():
+            print(f"{name:<14} median latency {result['latency'] * 1000:8.1f} ms   cached input {result['cached']:6.1%}   "
+                f"cost/request ${result['cost']:.7f}")
+        legacy, new = results["legacy"], results["static prefix"]
+        print(f"delta          latency {(new['latency'] - legacy['latency']) * 1000:+8.1f} ms   "
+            f"cost {(new['cost'] - legacy['cost']) / legacy['cost']:+.1%}")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# Local stand-in for the OpenAI Responses API, for the load tests: no API key, no cost, configurable latency and errors.
+# It answers POST /v1/responses (parsed and streamed) with outputs matching the structured output format of the request
+# (questions, feedback, batched feedback, triage), and a usage estimated from the input and output lengths.
+# GET /stats returns the request counts per endpoint, GET /reset clears them.
+#
+# Usage: python benchmarks/fake_openai_server.py [--port 8700] [--latency 1.0] [--jitter 0.3] [--error-rate 0.02]
+#   then run the app with OPENAI_BASE_URL=http://127.0.0.1:8700/v1
+import argparse
+import json
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep, time
+
+stats = {}
+stats_lock = threading.Lock()
+
+def count(endpoint: str):
+    with stats_lock:
+        stats[endpoint] = stats.get(endpoint, 0) + 1
+
+def input_text(body) -> str:
+    messages = body.get("input", "")
+    if isinstance(messages, str):
+        return messages
+    return "\n".join(str(message.get("content", "")) for message in messages)
+
+def feedback_item(answer: str) -> dict:
+    if "don't know" in answer.lower():
+        return {"answer_is_valid": False, "guidance": "Describe a concrete situation, the actions you took and the result.",
+            "strengths": [], "improvements": []}
+    return {"answer_is_valid": True, "guidance": "",
+        "strengths": ["You give a concrete example.", "The actions you took are clear."],
+        "improvements": ["Quantify the result.", "Explain the alternatives you considered."]}
+
+# The endpoint name (for the stats) and the output, from the properties of the requested JSON schema
+def fake_output(body):
+    properties = (((body.get("text") or {}).get("format") or {}).get("schema") or {}).get("properties", {})
+    text = input_text(body)
+    answers = re.findall(r"<answer>(.*?)</answer>", text, re.S)
+    if "questions" in properties:
+        match = re.search(r"Number of questions: (\d+)", text)
+        question_count = int(match.group(1)) if match else 5
+        return "questions", {"questions": [f"Question {i + 1}: describe a project where you had to solve a hard problem "
+            f"(request {random.randint(0, 10**6)})." for i in range(question_count)]}
+    if "triage" in properties:
+        return "triage", {"triage": [{"answer_is_valid": item["answer_is_valid"], "guidance": item["guidance"]}
+            for item in map(feedback_item, answers)]}
+    if "feedback" in properties:
+        return "feedback_batch", {"feedback": [feedback_item(answer) for answer in answers]}
+    return "feedback", feedback_item(answers[0] if answers else "")
+
+def fake_usage(body, output_text: str) -> dict:
+    input_tokens = len(input_text(body)) // 4
+    cached_tokens = input_tokens // 1024 * 1024 if input_tokens >= 1024 else 0
+    return {"input_tokens": input_tokens, "output_tokens": len(output_text) // 4, "total_tokens": input_tokens + len(output_text) // 4,
+        "input_tokens_details": {"cached_tokens": cached_tokens}, "output_tokens_details": {"reasoning_tokens": 0}}
+
+def response_object(body, output_text: str, status: str, usage) -> dict:
+    content = [{"type": "output_text", "text": output_text, "annotations": []}] if status == "completed" else []
+    return {"id": f"resp_{random.getrandbits(48):x}", "object": "response", "created_at": time(), "model": body.get("model", ""),
+        "status": status, "parallel_tool_calls": True, "tool_choice": "auto", "tools": [], "usage": usage,
+        "output": [{"type": "message", "id": "msg_1", "role": "assistant", "status": status, "content": content}] if content else []}
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status: int, data):
+        payload = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            with stats_lock:
+                self.send_json(200, dict(stats))
+        elif self.path == "/reset":
+            with stats_lock:
+                stats.clear()
+            self.send_json(200, {})
+        else:
+            self.send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        endpoint, output = fake_output(body)
+        endpoint += "_stream" if body.get("stream") else ""
+        count(endpoint)
+
+        config = self.config
+        if random.random() < config.error_rate:
+            count("errors")
+            sleep(config.error_latency)
+            self.send_json(503, {"error": {"message": "The server is overloaded (injected error)", "type": "server_error"}})
+            return
+        latency = max(0.0, random.gauss(config.latency, config.jitter))
+        if random.random() < config.slow_rate:
+            count("slow")
+            latency *= config.slow_factor
+
+        output_text = json.dumps(output)
+        if body.get("stream"):
+            self.stream(body, output_text, latency)
+        else:
+            sleep(latency)
+            self.send_json(200, response_object(body, output_text, "completed", fake_usage(body, output_text)))
+
+    # Server-sent events of the Responses streaming API: the output text arrives in deltas spread over the latency
+    def stream(self, body, output_text: str, latency: float):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        sequence = [0]
+
+        def send(event):
+            event["sequence_number"] = sequence[0]
+            sequence[0] += 1
+            self.wfile.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        item = {"type": "message", "id": "msg_1", "role": "assistant", "status": "in_progress", "content": []}
+        send({"type": "response.created", "response": response_object(body, "", "in_progress", None)})
+        sleep(latency * self.config.first_token_share)
+        send({"type": "response.output_item.added", "output_index": 0, "item": item})
+        send({"type": "response.content_part.added", "output_index": 0, "item_id": "msg_1", "content_index": 0,
+            "part": {"type": "output_text", "text": "", "annotations": []}})
+        deltas = [output_text[i:i + 16] for i in range(0, len(output_text), 16)]
+        for delta in deltas:
+            sleep(latency * (1 - self.config.first_token_share) / len(deltas))
+            send({"type": "response.output_text.delta", "output_index": 0, "item_id": "msg_1", "content_index": 0,
+                "delta": delta, "logprobs": []})
+        send({"type": "response.output_text.done", "output_index": 0, "item_id": "msg_1", "content_index": 0,
+            "text": output_text, "logprobs": []})
+        done_item = dict(item, status="completed", content=[{"type": "output_text", "text": output_text, "annotations": []}])
+        send({"type": "response.output_item.done", "output_index": 0, "item": done_item})
+        send({"type": "response.completed", "response": dict(response_object(body, output_text, "completed",
+            fake_usage(body, output_text)))})
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Responses API.")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean response time, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="Standard deviation of the response time, in seconds")
+    parser.add_argument("--first-token-share", type=float, default=0.2, help="Share of the latency before the first streamed delta")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the requests failing with 503")
+    parser.add_argument("--error-latency", type=float, default=0.05)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of the requests in the slow tail")
+    parser.add_argument("--slow-factor", type=float, default=5.0, help="Latency multiplier of the slow tail")
+    return parser.parse_args(argv)
+
+def serve(config):
+    FakeOpenAIHandler.config = config
+    server = ThreadingHTTPServer(("127.0.0.1", config.port), FakeOpenAIHandler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+if __name__ == "__main__":
+    serve(parse_args())
@@ -0,0 +1,318 @@
+# Load test of one app process: N simulated users go through the whole interview flow of interview_app.py with AppTest
+# (setup form, answering the questions, Finish, waiting for and viewing the feedback), concurrently, against the local
+# fake OpenAI server (benchmarks/fake_openai_server.py). All the sessions share the process and its singletons
+# (OpenAI client, scheduler, caches, metrics), as they do in a Streamlit server.
+# AppTest swaps a process-wide Runtime for each script run, so the script runs of the users are serialized here.
+# The background work (OpenAI requests, grading) stays concurrent. Streamlit runs the scripts in parallel threads,
+# but they mostly hold the GIL. The page latency is the duration of the AppTest run (the AppTest overhead included),
+# the wait for the other users' runs is reported apart, and the script run time measured by the app itself
+# gives the capacity estimate of the process (script runs per second of CPU).
+#
+# Reports the throughput, the p50/p95 latency per page action, the CPU time per script run, the memory per session and
+# the OpenAI requests per endpoint. Each run is appended to benchmarks/results/load_test.jsonl with the git commit,
+# and --compare shows the last runs side by side, to spot regressions across commits.
+#
+# Usage: python benchmarks/load_test.py [--users 10] [--latency 1.0] [--error-rate 0.02] [--think-time 1.0]
+#        python benchmarks/load_test.py --compare [--last 5]
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import urllib.request
+from time import perf_counter, process_time, sleep, time
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(ROOT, "interview_app.py")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results", "load_test.jsonl")
+
+app_run_lock = threading.Lock()     # One AppTest script run at a time in the process
+
+# Metrics shown by --compare: (label, path in the result, format)
+COMPARED_METRICS = [
+    ("interviews/min", ("throughput", "interviews_per_minute"), "{:.1f}"),
+    ("runs/s", ("throughput", "script_runs_per_second"), "{:.1f}"),
+    ("capacity runs/s", ("throughput", "capacity_script_runs_per_second"), "{:.0f}"),
+    ("p50 ms", ("page_latency_ms", "all", "p50"), "{:.0f}"),
+    ("p95 ms", ("page_latency_ms", "all", "p95"), "{:.0f}"),
+    ("CPU ms/run", ("cpu", "ms_per_script_run"), "{:.1f}"),
+    ("KB/session", ("memory", "rss_kb_per_session"), "{:.0f}"),
+    ("requests", ("requests", "app_total"), "{:.0f}"),
+    ("failed", ("users", "failed"), "{:.0f}"),
+]
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+def latency_summary(values: List[float]) -> Dict[str, float]:
+    return {"count": len(values), "p50": percentile(values, 0.50) * 1000, "p95": percentile(values, 0.95) * 1000,
+        "max": max(values, default=0.0) * 1000}
+
+def rss_kb() -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except OSError:
+        return "unknown"
+
+def start_fake_server(args) -> subprocess.Popen:
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "fake_openai_server.py"), "--port", str(args.port),
+        "--latency", str(args.latency), "--jitter", str(args.jitter), "--error-rate", str(args.error_rate),
+        "--slow-rate", str(args.slow_rate), "--slow-factor", str(args.slow_factor)])
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{args.port}/reset", timeout=1)
+            return server
+        except OSError:
+            sleep(0.1)
+    server.kill()
+    raise RuntimeError("The fake OpenAI server did not start")
+
+def fake_server_stats(port: int) -> Dict[str, int]:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=5) as response:
+        return json.loads(response.read())
+
+# One simulated user going through a whole interview. The duration of every script run is recorded with its action.
+class SimulatedUser:
+    def __init__(self, user_id: int, args, timings: Dict[str, List[float]], timings_lock: threading.Lock):
+        self.user_id = user_id
+        self.args = args
+        self.timings = timings
+        self.timings_lock = timings_lock
+        self.app = None
+        self.error = None
+
+    def run_app(self, action: str, element=None):
+        wait_start = perf_counter()
+        with app_run_lock:
+            start = perf_counter()
+            (element or self.app).run()
+            duration = perf_counter() - start
+        with self.timings_lock:
+            self.timings.setdefault(action, []).append(duration)
+            self.timings.setdefault("(harness wait)", []).append(start - wait_start)
+        if self.app.exception:
+            raise RuntimeError(f"User {self.user_id}, {action}: {self.app.exception[0].message}")
+
+    def button(self, label: str):
+        for button in self.app.button:
+            if button.label == label:
+                return button
+        raise RuntimeError(f"User {self.user_id}: no '{label}' button")
+
+    def think(self):
+        sleep(random.uniform(0.5, 1.5) * self.args.think_time)
+
+    def answer(self, question_number: int) -> str:
+        if random.random() < self.args.invalid_answer_rate:
+            return "I don't know"
+        topic = random.choice(["a deployment pipeline", "a billing migration", "a reporting service", "an onboarding flow"])
+        return (f"In my previous role I worked on {topic}. I planned the work with the team, measured the results "
+            f"after each release and improved the process step by step (user {self.user_id}, answer {question_number}).")
+
+    def wait_until(self, condition, action: str):
+        deadline = perf_counter() + self.args.timeout
+        while not condition():
+            if perf_counter() > deadline:
+                raise TimeoutError(f"User {self.user_id}: timed out waiting in '{action}'")
+            sleep(self.args.poll_interval)
+            self.run_app(action)
+
+    def run(self):
+        from streamlit.testing.v1 import AppTest
+        self.app = AppTest.from_file(APP_PATH, default_timeout=self.args.timeout)
+        state = self.app.session_state
+        self.run_app("setup")
+        self.think()
+        self.app.number_input[0].set_value(self.args.questions)
+        self.run_app("generate", self.button("Generate Questions").click())
+
+        for step in range(1, self.args.questions + 1):
+            self.wait_until(lambda: len(state["questions"]) >= step, "wait_question")
+            self.think()
+            self.app.text_area[0].set_value(self.answer(step))
+            self.run_app("answer", self.button("Next →" if step < self.args.questions else "Finish✅").click())
+
+        self.wait_until(lambda: state["answer_feedback"] and all(f is not None for f in state["answer_feedback"]), "wait_feedback")
+        self.run_app("view_feedback", self.button("View feedback").click())
+        for step in range(1, self.args.questions):
+            self.think()
+            self.run_app("feedback_page", self.button("Next →").click())
+
+def run_load_test(args) -> Dict:
+    os.environ["OPENAI_API_KEY"] = "sk-load-test"
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{args.port}/v1"
+    os.environ["INTERVIEW_LLM_MODE"] = "live"
+    os.chdir(tempfile.mkdtemp(prefix="interview_load_test_"))    # The caches and the session store of the app start empty
+    sys.path.insert(0, ROOT)
+
+    server = start_fake_server(args)
+    try:
+        timings: Dict[str, List[float]] = {}
+        timings_lock = threading.Lock()
+        users = [SimulatedUser(i, args, timings, timings_lock) for i in range(args.users)]
+
+        # Warm-up: the imports and the process-wide resources are created before the measurement
+        from streamlit.testing.v1 import AppTest
+        AppTest.from_file(APP_PATH, default_timeout=args.timeout).run()
+        from instrumentation import metrics
+        from session_store import approximate_size
+        urllib.request.urlopen(f"http://127.0.0.1:{args.port}/reset", timeout=5)
+        rss_before = rss_kb()
+        script_runs_before = sum(summary["count"] for summary in metrics.snapshot()["script_runs"].values())
+
+        def run_user(user: SimulatedUser):
+            sleep(random.uniform(0, args.ramp_up))
+            try:
+                user.run()
+            except Exception as e:
+                user.error = f"{type(e).__name__}: {e}"
+
+        start, cpu_start = perf_counter(), process_time()
+        threads = [threading.Thread(target=run_user, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        duration, cpu_seconds = perf_counter() - start, process_time() - cpu_start
+
+        # Measured while all the sessions are still alive
+        rss_after = rss_kb()
+        state_sizes = [approximate_size({key: user.app.session_state[key] for key in ("questions", "answers", "answer_feedback",
+            "usage_by_mode", "question_timing")}) for user in users if user.app is not None and user.error is None]
+        snapshot = metrics.snapshot()
+        server_stats = fake_server_stats(args.port)
+    finally:
+        server.terminate()
+
+    completed = sum(user.error is None for user in users)
+    script_runs = sum(summary["count"] for summary in snapshot["script_runs"].values()) - script_runs_before
+    app_requests = {f"{row['operation']}/{row['model']}": row["outcomes"] for row in snapshot["llm"]}
+    harness_wait = timings.pop("(harness wait)", [])
+    all_timings = [duration for durations in timings.values() for duration in durations]
+    script_run_seconds = sum(summary["sum"] for summary in snapshot["script_runs"].values())
+    script_run_count = sum(summary["count"] for summary in snapshot["script_runs"].values())
+    return {
+        "timestamp": time(),
+        "commit": git_commit(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("compare", "last", "output", "no_save")},
+        "users": {"started": args.users, "completed": completed, "failed": args.users - completed,
+            "errors": sorted({user.error for user in users if user.error})[:10]},
+        "duration_seconds": duration,
+        "throughput": {"interviews_per_minute": completed / duration * 60, "script_runs_per_second": script_runs / duration,
+            "capacity_script_runs_per_second": script_run_count / script_run_seconds if script_run_seconds else 0.0},
+        "page_latency_ms": {"all": latency_summary(all_timings),
+            **{action: latency_summary(durations) for action, durations in sorted(timings.items())}},
+        "script_run_ms": {page: {"count": summary["count"], "p50": summary["p50"] * 1000, "p95": summary["p95"] * 1000}
+            for page, summary in snapshot["script_runs"].items()},
+        "harness_wait_ms": latency_summary(harness_wait),
+        "cpu": {"seconds": cpu_seconds, "script_runs": script_runs, "ms_per_script_run": cpu_seconds / max(1, script_runs) * 1000},
+        "memory": {"rss_kb_before": rss_before, "rss_kb_after": rss_after,
+            "rss_kb_per_session": (rss_after - rss_before) / max(1, args.users),
+            "state_bytes_per_session": sum(state_sizes) / max(1, len(state_sizes))},
+        "requests": {"app_total": sum(sum(outcomes.values()) for outcomes in app_requests.values()),
+            "app": app_requests, "fake_server": server_stats},
+        "cost_per_interview": sum(row["cost"] for row in snapshot["llm"]) / max(1, completed),
+    }
+
+def print_report(result: Dict):
+    print(f"commit {result['commit']}: {result['users']['completed']}/{result['users']['started']} interviews completed "
+        f"in {result['duration_seconds']:.1f} s")
+    for error in result["users"]["errors"]:
+        print(f"  error: {error}")
+    print(f"throughput: {result['throughput']['interviews_per_minute']:.1f} interviews/min, "
+        f"{result['throughput']['script_runs_per_second']:.1f} script runs/s "
+        f"(capacity of the app script alone: {result['throughput']['capacity_script_runs_per_second']:.0f} runs/s)")
+    print(f"{'action':<16}{'runs':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for action, summary in result["page_latency_ms"].items():
+        print(f"{action:<16}{summary['count']:>8}{summary['p50']:>10.1f}{summary['p95']:>10.1f}{summary['max']:>10.1f}")
+    print(f"harness wait for the other users' runs: p50 {result['harness_wait_ms']['p50']:.1f} ms, "
+        f"p95 {result['harness_wait_ms']['p95']:.1f} ms")
+    print("script runs (app metrics): " + ", ".join(f"{page} p50 {summary['p50']:.1f} ms p95 {summary['p95']:.1f} ms"
+        for page, summary in result["script_run_ms"].items()))
+    print(f"CPU: {result['cpu']['seconds']:.2f} s for {result['cpu']['script_runs']} script runs "
+        f"({result['cpu']['ms_per_script_run']:.1f} ms per run, simulated users included)")
+    print(f"memory: {result['memory']['rss_kb_per_session']:.0f} KB RSS per session, "
+        f"{result['memory']['state_bytes_per_session']:.0f} bytes of interview state per session")
+    print(f"OpenAI requests (app): {json.dumps(result['requests']['app'])}")
+    print(f"OpenAI requests (fake server): {json.dumps(result['requests']['fake_server'])}")
+    print(f"cost per interview: ${result['cost_per_interview']:.6f}")
+
+def metric_value(result: Dict, path):
+    for key in path:
+        result = result.get(key, {}) if isinstance(result, dict) else {}
+    return result if isinstance(result, (int, float)) else None
+
+# The last runs side by side, with the change of the last one from the one before
+def print_comparison(path: str, last: int):
+    if not os.path.exists(path):
+        print(f"No results in {path}")
+        return
+    with open(path, encoding="utf-8") as results_file:
+        results = [json.loads(line) for line in results_file if line.strip()][-last:]
+    print(f"{'commit':<16}{'users':>6}" + "".join(f"{label:>16}" for label, _, _ in COMPARED_METRICS))
+    for result in results:
+        cells = []
+        for _, path, value_format in COMPARED_METRICS:
+            value = metric_value(result, path)
+            cells.append(f"{value_format.format(value) if value is not None else '-':>16}")
+        print(f"{result['commit']:<16}{result['config']['users']:>6}" + "".join(cells))
+    if len(results) >= 2:
+        cells = []
+        for _, path, _ in COMPARED_METRICS:
+            previous, current = metric_value(results[-2], path), metric_value(results[-1], path)
+            change = f"{(current - previous) / previous:+.0%}" if previous and current is not None else "-"
+            cells.append(f"{change:>16}")
+        print(f"{'change':<22}" + "".join(cells))
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test of interview_app.py with simulated users and a fake OpenAI server.")
+    parser.add_argument("--users", type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument("--questions", type=int, default=5, help="Questions per interview")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Mean seconds a user takes before each action")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="The users start at random times within these seconds")
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="Seconds between reruns while waiting for the questions/feedback")
+    parser.add_argument("--invalid-answer-rate", type=float, default=0.1, help="Share of the answers that are 'I don't know'")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds a user waits for a page or for the feedback")
+    parser.add_argument("--port", type=int, default=8700, help="Port of the fake OpenAI server")
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean latency of the fake OpenAI server, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of the requests failing with 503")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Share of the requests in the slow tail")
+    parser.add_argument("--slow-factor", type=float, default=5.0)
+    parser.add_argument("--output", default=RESULTS_PATH, help="JSONL file the result is appended to (and read by --compare)")
+    parser.add_argument("--no-save", action="store_true", help="Print the report only")
+    parser.add_argument("--compare", action="store_true", help="Show the last saved runs side by side instead of running")
+    parser.add_argument("--last", type=int, default=5, help="Number of runs shown by --compare")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_comparison(args.output, args.last)
+        return
+
+    output = os.path.abspath(args.output)
+    result = run_load_test(args)
+    print_report(result)
+    if not args.no_save:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "a", encoding="utf-8") as results_file:
+            results_file.write(json.dumps(result) + "\n")
+        print(f"saved to {output}")
+
+if __name__ == "__main__":
+    main()
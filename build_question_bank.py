@@ -0,0 +1,99 @@
+# Builds the question bank used by the "bank" mode of the app (use_question_bank in interview_app.py).
+# For every job title and difficulty level, the behavioral and the technical pools are filled with generated questions
+# until they reach the pool size. Near-duplicate questions (MinHash similarity) are dropped.
+# Running it again tops up the existing pools.
+#
+# Usage: python build_question_bank.py "Software Developer" "Data Engineer" [--difficulty Hard] [--pool-size 100]
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from helper_functions import get_openai_client
+from instrumentation import usage_cost, usage_tokens
+from interview_config import *
+from interview_models import Questions
+from prompts import QUESTIONS_CACHE_KEY, question_pool_prompt
+from question_bank import QUESTION_KINDS, NearDuplicateIndex, get_question_bank
+from rate_limiter import current_session
+from resilience import get_resilient_caller, time_left
+
+# Requests in a row without any new question after which a pool is considered exhausted
+MAX_UNPRODUCTIVE_REQUESTS = 3
+
+totals = {"requests": 0, "input": 0, "cached": 0, "output": 0, "cost": 0.0}
+totals_lock = threading.Lock()
+
+# The requests have the same deadline, retries and circuit breaker as in the app, without hedging
+def request_questions(job_title: str, difficulty_level: str, kind: str, question_count: int, openai_model: str) -> List[str]:
+    caller = get_resilient_caller(openai_max_retries, openai_backoff_base, openai_backoff_cap, circuit_failure_threshold, circuit_reset_timeout)
+    response = caller.call("questions", openai_model, lambda deadline_at: get_openai_client().responses.parse(
+        model=openai_model,
+        input=question_pool_prompt(job_title, difficulty_level, kind, question_count),
+        prompt_cache_key=QUESTIONS_CACHE_KEY,
+        temperature=1.0,
+        top_p=0.9,
+        max_output_tokens=question_count*40,
+        text_format=Questions,
+        timeout=time_left(deadline_at)
+    ), openai_deadlines["questions"])
+    count_usage(response, openai_model)
+    # The responses that arrived after their deadline were paid too
+    for _, late_response in caller.take_extra_results(current_session()):
+        count_usage(late_response, openai_model)
+    return response.output_parsed.questions
+
+def count_usage(response, openai_model: str):
+    tokens = usage_tokens(response.usage)
+    with totals_lock:
+        totals["requests"] += 1
+        for token_type, count in tokens.items():
+            totals[token_type] += count
+        totals["cost"] += usage_cost(tokens, openai_price_per_1m_tokens[openai_model])
+
+def fill_pool(bank, job_title: str, difficulty_level: str, kind: str, args) -> Dict[str, int]:
+    index = NearDuplicateIndex(args.threshold)
+    for question in bank.pool(job_title, difficulty_level, kind):
+        index.add(question)
+
+    size = bank.pool_size(job_title, difficulty_level, kind)
+    added = duplicates = unproductive = 0
+    while size < args.pool_size and unproductive < MAX_UNPRODUCTIVE_REQUESTS:
+        generated = request_questions(job_title, difficulty_level, kind, min(args.batch_size, args.pool_size - size), args.model)
+        new_questions = [question.strip() for question in generated if question.strip() and index.add(question)]
+        new_questions = new_questions[:args.pool_size - size]
+        duplicates += len(generated) - len(new_questions)
+        unproductive = 0 if new_questions else unproductive + 1
+        bank.add(job_title, difficulty_level, kind, new_questions)
+        size += len(new_questions)
+        added += len(new_questions)
+
+    print(f"{job_title} / {difficulty_level} / {kind}: {size} questions ({added} added, {duplicates} near-duplicates dropped)")
+    return {"added": added, "duplicates": duplicates}
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generates the question pools of the question bank.")
+    parser.add_argument("job_titles", nargs="+")
+    parser.add_argument("--difficulty", action="append", choices=difficulty_levels,
+        help="Difficulty level to build (repeatable). All the levels by default.")
+    parser.add_argument("--pool-size", type=int, default=question_bank_pool_size)
+    parser.add_argument("--batch-size", type=int, default=question_bank_batch_size)
+    parser.add_argument("--threshold", type=float, default=question_bank_dedup_threshold)
+    parser.add_argument("--model", default=default_openai_model, choices=openai_models)
+    parser.add_argument("--bank", default=question_bank_path)
+    parser.add_argument("--workers", type=int, default=4, help="Pools filled concurrently")
+    args = parser.parse_args()
+
+    bank = get_question_bank(args.bank)
+    pools = [(job_title, difficulty_level, kind) for job_title in args.job_titles
+        for difficulty_level in args.difficulty or difficulty_levels for kind in QUESTION_KINDS]
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        results = list(executor.map(lambda pool: fill_pool(bank, *pool, args), pools))
+
+    print(f"{len(pools)} pools, {sum(r['added'] for r in results)} questions added, "
+        f"{sum(r['duplicates'] for r in results)} near-duplicates dropped")
+    print(f"{totals['requests']} requests, {totals['input']} input tokens ({totals['cached']} cached), "
+        f"{totals['output']} output tokens, cost ${totals['cost']:.6f}")
+
+if __name__ == "__main__":
+    main()
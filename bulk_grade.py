@@ -0,0 +1,190 @@
+# Grades recorded mock-interview answers without the UI.
+# The input is a JSONL file of question/answer pairs: {"id": ..., "question": ..., "answer": ...} (the id defaults to the
+# line number). The pairs are streamed from the file, validated like in the app, and graded with the feedback prompt of
+# the app, a few requests at a time. Each result is appended to the output JSONL as soon as it is ready.
+# The output file is the checkpoint: running the command again skips the ids already in it, so an interrupted run resumes.
+# The answers failing because the provider is degraded are not written, so the next run grades them again.
+#
+# Usage: python bulk_grade.py answers.jsonl graded.jsonl [--model gpt-4o-mini] [--workers 8]
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter, sleep
+from typing import Dict, Iterator, Set, Tuple
+
+from feedback_cascade import invalid_answer_feedback, precheck_answer
+from helper_functions import get_openai_client
+from input_validation import get_input_validator
+from instrumentation import usage_cost, usage_tokens
+from interview_config import *
+from interview_models import FeedbackResponse
+from prompts import FEEDBACK_CACHE_KEY, FEEDBACK_SAMPLING, feedback_prompt
+from rate_limiter import current_session
+from resilience import CircuitOpenError, get_resilient_caller, is_provider_failure, time_left
+
+totals = {"graded": 0, "prechecked": 0, "invalid": 0, "failed": 0, "skipped": 0,
+    "requests": 0, "input": 0, "cached": 0, "output": 0, "cost": 0.0}
+totals_lock = threading.Lock()
+output_lock = threading.Lock()
+
+def add_totals(**counts):
+    with totals_lock:
+        for key, value in counts.items():
+            totals[key] += value
+
+# The ids already in the output file. A last line cut by an interruption is removed: that pair is graded again.
+def read_checkpoint(path: str) -> Set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, "rb+") as output_file:
+        content = output_file.read()
+        if content and not content.endswith(b"\n"):
+            output_file.truncate(content.rfind(b"\n") + 1)
+            content = content[:content.rfind(b"\n") + 1]
+    return {str(json.loads(line)["id"]) for line in content.decode("utf-8").splitlines() if line.strip()}
+
+# The id, question and answer of each line, and the error of the lines that cannot be read ("" if none).
+# A malformed line gets its line number as id, so it is reported once in the output and skipped on resume.
+def read_pairs(path: str) -> Iterator[Tuple[str, str, str, str]]:
+    with open(path, encoding="utf-8") as input_file:
+        for line_number, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                item = f"invalid JSON ({e})"
+            if not isinstance(item, dict) or not all(isinstance(item.get(field, ""), str) for field in ("question", "answer")):
+                error = item if isinstance(item, str) else "not an object with a question and an answer"
+                yield str(line_number), "", "", f"Line {line_number} cannot be read: {error}."
+                continue
+            yield str(item.get("id", line_number)), item.get("question", ""), item.get("answer", ""), ""
+
+# Returns "" if the pair can be graded, otherwise the error message. Same rules as the answers typed in the app.
+def validate_pair(question: str, answer: str) -> str:
+    if not question.strip():
+        return "The question is empty."
+    if not answer.strip():
+        return "The answer is empty."
+    if len(answer) > answer_max_length:
+        return f"The answer is too long. It should have maximum {answer_max_length} characters."
+    return get_input_validator().validate_text(answer)
+
+def resilient_caller():
+    return get_resilient_caller(openai_max_retries, openai_backoff_base, openai_backoff_cap, circuit_failure_threshold, circuit_reset_timeout)
+
+def request_feedback(question: str, answer: str, openai_model: str):
+    return resilient_caller().call("per_question", openai_model, lambda deadline_at: get_openai_client().responses.parse(
+        model=openai_model,
+        input=feedback_prompt(question, answer),
+        prompt_cache_key=FEEDBACK_CACHE_KEY,
+        **FEEDBACK_SAMPLING,
+        max_output_tokens=feedback_max_output_tokens,
+        text_format=FeedbackResponse,
+        timeout=time_left(deadline_at)
+    ), openai_deadlines["per_question"])
+
+# Returns the result line of the pair, or None if it could not be graded because the provider is degraded.
+# While the circuit is open, the request waits for it to close (at most max_wait seconds).
+def grade_pair(item_id: str, question: str, answer: str, args, error: str = "") -> Dict:
+    result = {"id": item_id, "question": question, "answer": answer}
+    if error:
+        print(error, file=sys.stderr)
+    error = error or validate_pair(question, answer)
+    if error:
+        add_totals(invalid=1)
+        return dict(result, error=error)
+
+    guidance = precheck_answer(answer, answer_min_words, answer_min_unique_word_ratio) if args.precheck else ""
+    if guidance:
+        add_totals(graded=1, prechecked=1)
+        return dict(result, feedback=invalid_answer_feedback(guidance).model_dump(), graded_by="precheck")
+
+    start = perf_counter()
+    while True:
+        try:
+            response = request_feedback(question, answer, args.model)
+            break
+        except CircuitOpenError:
+            if perf_counter() - start > args.max_wait:
+                raise
+            sleep(circuit_reset_timeout)
+
+    tokens = usage_tokens(response.usage)
+    cost = usage_cost(tokens, openai_price_per_1m_tokens[args.model])
+    add_totals(requests=1, cost=cost, **tokens)
+    # The responses that arrived after their deadline were paid too
+    for _, late_response in resilient_caller().take_extra_results(current_session()):
+        late_tokens = usage_tokens(late_response.usage)
+        add_totals(requests=1, cost=usage_cost(late_tokens, openai_price_per_1m_tokens[args.model]), **late_tokens)
+    if response.output_parsed is None:
+        add_totals(failed=1)
+        return dict(result, error="The response has no feedback.", usage=tokens, cost=cost)
+    add_totals(graded=1)
+    return dict(result, feedback=response.output_parsed.model_dump(), graded_by=args.model, usage=tokens, cost=cost)
+
+def grade_and_write(item_id: str, question: str, answer: str, error: str, args, output_file):
+    try:
+        result = grade_pair(item_id, question, answer, args, error)
+    except Exception as e:
+        add_totals(failed=1)
+        if is_provider_failure(e):
+            print(f"{item_id}: not graded, the provider is degraded ({type(e).__name__}). Run again to retry.", file=sys.stderr)
+            return
+        result = {"id": item_id, "question": question, "answer": answer, "error": f"{type(e).__name__}: {e}"}
+
+    with output_lock:
+        output_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output_file.flush()
+        done = totals["graded"] + totals["invalid"] + totals["failed"]
+        if args.progress and done % args.progress == 0:
+            print(f"{done} answers done", file=sys.stderr)
+
+def print_summary(elapsed: float, interrupted: bool):
+    done = totals["graded"] + totals["invalid"]
+    print(f"{'Interrupted: run again to resume. ' if interrupted else ''}"
+        f"{totals['graded']} answers graded ({totals['prechecked']} by the pre-check, without request), "
+        f"{totals['invalid']} invalid, {totals['failed']} failed, {totals['skipped']} already graded")
+    print(f"{elapsed:.1f} s, {done / elapsed if elapsed else 0:.2f} answers/s")
+    print(f"{totals['requests']} requests, {totals['input']} input tokens ({totals['cached']} cached), "
+        f"{totals['output']} output tokens, cost ${totals['cost']:.6f} "
+        f"(${totals['cost'] / max(1, totals['graded']):.6f} per graded answer)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Grades the question/answer pairs of a JSONL file.")
+    parser.add_argument("input", help="JSONL file with the id, question and answer of each pair")
+    parser.add_argument("output", help="JSONL file the results are appended to, also the checkpoint of the run")
+    parser.add_argument("--model", default=default_openai_model, choices=openai_models)
+    parser.add_argument("--workers", type=int, default=feedback_max_workers, help="Requests sent to OpenAI in parallel")
+    parser.add_argument("--no-precheck", dest="precheck", action="store_false",
+        help="Send every answer to the model, even the ones the local pre-check rejects")
+    parser.add_argument("--max-wait", type=float, default=300, help="Seconds an answer waits for an open circuit to close")
+    parser.add_argument("--progress", type=int, default=100, help="Print the progress every N answers (0: never)")
+    args = parser.parse_args()
+
+    done_ids = read_checkpoint(args.output)
+    workers = max(1, args.workers)
+    in_flight = threading.BoundedSemaphore(workers * 2)    # The input is read as the answers are graded
+    executor = ThreadPoolExecutor(max_workers=workers)
+    start = perf_counter()
+    interrupted = False
+    with open(args.output, "a", encoding="utf-8") as output_file:
+        try:
+            for item_id, question, answer, error in read_pairs(args.input):
+                if item_id in done_ids:
+                    totals["skipped"] += 1
+                    continue
+                done_ids.add(item_id)
+                in_flight.acquire()
+                executor.submit(grade_and_write, item_id, question, answer, error, args, output_file).add_done_callback(lambda _: in_flight.release())
+        except KeyboardInterrupt:
+            interrupted = True
+        finally:
+            executor.shutdown(wait=True, cancel_futures=interrupted)    # The requests already sent are written before the file closes
+    print_summary(perf_counter() - start, interrupted)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import re
+from typing import List
+
+from interview_models import FeedbackResponse
+
+# First stage of the grading cascade: a local pre-check that recognizes the answers that are clearly not valid,
+# without any OpenAI request. It only catches the obvious cases; anything else goes on to the triage model.
+
+TOO_SHORT_GUIDANCE = ("Your answer is too short to be evaluated. A proper answer should be a detailed example, "
+    "ideally structured using the STAR method (Situation, Task, Action, Result).")
+REPETITIVE_GUIDANCE = ("Your answer mostly repeats the same words or characters. A proper answer should describe a concrete "
+    "situation, the actions you took and their result, ideally using the STAR method (Situation, Task, Action, Result).")
+
+# The scripts written without spaces between the words: Thai, Lao, Myanmar, Khmer, Japanese kana and the CJK ideographs
+UNSPACED_SCRIPT_CHAR = r"[\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]"
+SPACED_WORD = rf"(?:(?!{UNSPACED_SCRIPT_CHAR})[^\W\d_])+"
+
+# The words of the space-separated scripts
+def answer_words(answer: str) -> List[str]:
+    return re.findall(SPACED_WORD, answer.lower())
+
+# Returns the guidance if the answer is clearly not valid, otherwise an empty string.
+# The words cannot be counted in the scripts without spaces: their characters are counted instead, one per word,
+# which is lenient (a word is often several characters), and the repeated words check is not applied to them.
+def precheck_answer(answer: str, min_words: int, min_unique_word_ratio: float) -> str:
+    words = answer_words(answer)
+    if len(words) + len(re.findall(UNSPACED_SCRIPT_CHAR, answer)) < min_words:
+        return TOO_SHORT_GUIDANCE
+
+    # Same word over and over
+    if len(words) >= 2 * min_words and len(set(words)) / len(words) < min_unique_word_ratio:
+        return REPETITIVE_GUIDANCE
+    # A key held down: a run of the same letter ("aaaaaaaaaa"), or runs of any character making up most of the answer
+    # ("!!!!!!!!!!"). A separator ("----------") or a number ("10000000000") in a normal answer is fine.
+    if re.search(r"([^\W\d_])\1{9,}", answer):
+        return REPETITIVE_GUIDANCE
+    repeated = sum(len(match.group()) for match in re.finditer(r"(\S)\1{9,}", answer))
+    if repeated > len(re.sub(r"\s", "", answer)) / 2:
+        return REPETITIVE_GUIDANCE
+
+    return ""
+
+def invalid_answer_feedback(guidance: str) -> FeedbackResponse:
+    return FeedbackResponse(answer_is_valid=False, guidance=guidance, strengths=[], improvements=[])
@@ -1,10 +1,73 @@
 from dotenv import load_dotenv
+from functools import lru_cache, wraps
+import json
 import os
+import threading
+from interview_config import llm_fixtures_path, llm_replay_latency, llm_transport_mode
 
+# Streamlit reruns the app script on every interaction, but imported modules stay loaded,
+# so the values below are created once per process and shared by all the sessions.
+
+# Decorator of the factories of the process-wide values (clients, caches, stores...): the value is created on the first call
+# with the given arguments and returned by the next calls with the same arguments. Unlike lru_cache, the value is created
+# under a lock, so concurrent first calls create a single one. The arguments may be dicts (the limits in the config).
+def process_wide(factory):
+    instances = {}
+    lock = threading.Lock()
+
+    @wraps(factory)
+    def get(*args, **kwargs):
+        key = json.dumps([args, kwargs], sort_keys=True, default=repr)
+        with lock:
+            if key not in instances:
+                instances[key] = factory(*args, **kwargs)
+            return instances[key]
+    return get
+
+@lru_cache(maxsize=1)
 def get_openai_api_key():
     # Load variables from .env into environment
     load_dotenv()
     return os.getenv("OPENAI_API_KEY")
 
+# The LLM transport mode: "live", "record" or "replay" (see llm_transport.py). The environment overrides the config.
+def llm_mode() -> str:
+    mode = os.getenv("INTERVIEW_LLM_MODE", llm_transport_mode)
+    if mode not in ("live", "record", "replay"):
+        raise ValueError(f"Unknown LLM transport mode: {mode}")
+    return mode
+
+def llm_replay_latency_seconds():
+    latency = os.getenv("INTERVIEW_LLM_REPLAY_LATENCY")
+    if latency is None or latency == "":
+        return llm_replay_latency
+    return None if latency == "recorded" else float(latency)
+
+_warm_up_started = False
+
+# One client for the whole process, so its HTTP connection pool (and the kept-alive connections) are reused.
+# The client does not retry by itself: the retries are done by the resilience layer (resilience.py), within the deadlines.
+def get_openai_client():
+    return create_openai_client(llm_mode())
+
+@process_wide
+def create_openai_client(mode: str):
+    from openai import OpenAI   # Imported on first use: importing openai is slow and not needed to render the first page
+    if mode == "live":
+        return OpenAI(api_key=get_openai_api_key(), max_retries=0)
+    from openai import DefaultHttpxClient
+    from llm_transport import make_transport
+    transport = make_transport(mode, os.getenv("INTERVIEW_LLM_FIXTURES", llm_fixtures_path), llm_replay_latency_seconds())
+    # No API key is needed to replay
+    api_key = get_openai_api_key() or ("replay" if mode == "replay" else None)
+    return OpenAI(api_key=api_key, max_retries=0, http_client=DefaultHttpxClient(transport=transport))
+
+# Creates the client in a background thread, so neither the first page nor the first request waits for the openai import
+def warm_up_openai_client():
+    global _warm_up_started
+    if not _warm_up_started:
+        _warm_up_started = True
+        threading.Thread(target=get_openai_client, daemon=True).start()
+
 def safe_get(lst, index, default=None):
-    return lst[index] if 0 <= index < len(lst) else default    
\ No newline at end of file
+    return lst[index] if 0 <= index < len(lst) else default
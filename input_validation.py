@@ -0,0 +1,135 @@
+import os
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from helper_functions import process_wide
+
+# Disallowed keywords (prompt injection / sensitive terms). They are matched anywhere in the text, case-insensitive.
+BANNED_KEYWORDS = [
+    "ignore previous", "system prompt", "assistant", "instruction",
+    "api key", "password", "token", "secret",
+    "sudo", "rm -rf", "exec(", "import os", "subprocess",
+    "kill", "drop table", "delete from"
+]
+
+# Same character substitutions as better_profanity, so "sh1t" or "a$$" are still detected
+PROFANITY_CHARS_MAPPING = {
+    "a": ("a", "@", "*", "4"),
+    "i": ("i", "*", "l", "1"),
+    "o": ("o", "*", "0", "@"),
+    "u": ("u", "*", "v"),
+    "v": ("v", "*", "u"),
+    "l": ("l", "1"),
+    "e": ("e", "*", "3"),
+    "s": ("s", "$", "5"),
+    "t": ("t", "7"),
+}
+
+# better_profanity splits the text into words made of letters, digits and these characters
+WORD_SYMBOLS = "@$*\"'"
+WORD_CHAR = rf"(?:[^\W_]|[{re.escape(WORD_SYMBOLS)}])"
+WORD_SEPARATOR = rf"(?:[^\w{re.escape(WORD_SYMBOLS)}]|_)+"
+
+ALLOWED_TEXT_PATTERN = r"[\w\s.,!?;:()'\-&%“”\"\/]+"
+JOB_TITLE_PATTERN = r'^[A-Za-z0-9 &-]{3,50}$'
+
+def is_word_char(char: str) -> bool:
+    return (char.isalnum() and char != "_") or char in WORD_SYMBOLS
+
+# Reads the profanity wordlist shipped with better_profanity, without importing the package:
+# importing it builds its own 5MB+ wordset, which is not needed here.
+def read_profanity_wordlist() -> List[str]:
+    spec = find_spec("better_profanity")
+    path = os.path.join(list(spec.submodule_search_locations)[0], "profanity_wordlist.txt")
+    with open(path, encoding="utf-8") as wordlist_file:
+        return [row.strip().lower() for row in wordlist_file if row.strip()]
+
+def char_pattern(char: str) -> str:
+    variants = PROFANITY_CHARS_MAPPING.get(char, (char,))
+    if len(variants) == 1:
+        return re.escape(char)
+    return "[" + "".join(re.escape(variant) for variant in variants) + "]"
+
+# Builds one regex matching all the words, with the common prefixes factored out (a trie),
+# so that the regex engine does not try every word at every position.
+# Like better_profanity, a word may be split over several words of the text ("as s here" matches "ass").
+# Deliberately stricter than better_profanity: it never joins a one-character word ending the text ("as s" and
+# "h e l l" pass it) and joins at most 6 words, while here any split is matched.
+def trie_regex(words: Iterable[str]) -> str:
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def node_regex(node: Dict, previous_is_word_char: bool) -> str:
+        alternatives = []
+        for char in sorted(key for key in node if key != ""):
+            separator = f"(?:{WORD_SEPARATOR})?" if previous_is_word_char and is_word_char(char) else ""
+            alternatives.append(separator + char_pattern(char) + node_regex(node[char], is_word_char(char)))
+        if not alternatives:
+            return ""
+        regex = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+        if "" in node:
+            regex = f"(?:{regex})?"
+        return regex
+
+    return node_regex(trie, False)
+
+# Validates the user input with simple hard filters.
+# All the patterns are compiled once; the banned keywords and the profanity wordlist are checked in a single scan.
+class InputValidator:
+    def __init__(self, banned_keywords: List[str], profanity_words: List[str], memo_size: int = 1024):
+        self.allowed_text = re.compile(ALLOWED_TEXT_PATTERN, flags=re.UNICODE)
+        self.job_title = re.compile(JOB_TITLE_PATTERN)
+        keywords = "|".join(re.escape(keyword) for keyword in sorted(banned_keywords, key=len, reverse=True))
+        self.keywords = re.compile(keywords, flags=re.IGNORECASE | re.UNICODE)
+        profanity = trie_regex(profanity_words)
+        self.matcher = re.compile(rf"(?P<keyword>{keywords})|(?<!{WORD_CHAR})(?P<profanity>{profanity})(?!{WORD_CHAR})",
+            flags=re.IGNORECASE | re.UNICODE)
+        # Streamlit validates the same texts on every rerun, so the results are memoized per text
+        self.validate_text = lru_cache(maxsize=memo_size)(self.validate_text_uncached)
+
+    # Returns an empty string if the input is valid, otherwise returns the error message
+    def validate_text_uncached(self, input_str: str) -> str:
+        text = input_str.strip()
+
+        # Allowed characters check (letters, digits, punctuation, spaces)
+        if not self.allowed_text.fullmatch(text):
+            return "Should contain letters, digits, punctuation, spaces only"
+
+        contains_profanity = False
+        for match in self.matcher.finditer(input_str):
+            if match.lastgroup == "keyword":
+                return "Contains disallowed keywords"
+            contains_profanity = True
+
+        if contains_profanity:
+            # A profanity match may hide a keyword that overlaps it, and the keywords take precedence
+            if self.keywords.search(input_str):
+                return "Contains disallowed keywords"
+            return "Contains profanity"
+
+        return ""  # No issues found
+
+    # Returns "" if the job title is valid, otherwise returns the error message
+    def validate_job_title(self, title: str) -> str:
+        if not self.job_title.match(title):
+            return "Should be 3-50 characters long, only contain letters, numbers, spaces, hyphens, and ampersands"
+
+        return self.validate_text(title)
+
+    def validate_many(self, texts: Iterable[str]) -> List[str]:
+        return [self.validate_text(text) for text in texts]
+
+    def memo_info(self) -> Tuple[int, int]:
+        info = self.validate_text.cache_info()
+        return info.hits, info.misses
+
+# Returns the validator of the process, shared by all the sessions
+@process_wide
+def get_input_validator() -> InputValidator:
+    return InputValidator(BANNED_KEYWORDS, read_profanity_wordlist())
@@ -0,0 +1,272 @@
+import json
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter, sleep, time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Process-wide metrics of the app: latency, tokens and outcome of every OpenAI request, and the duration of the script runs.
+# They are exposed in the Prometheus text format, as JSON snapshots, and in the admin panel of the app.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Latency histogram with Prometheus-style cumulative buckets.
+# The quantiles are computed from a window of the most recent observations.
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, window: int = 2000):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(len(values) * q))]
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "sum": self.sum,
+            "p50": self.quantile(0.50), "p95": self.quantile(0.95), "p99": self.quantile(0.99)}
+
+def usage_tokens(usage) -> Dict[str, int]:
+    if usage is None:
+        return {"input": 0, "output": 0, "cached": 0}
+    if isinstance(usage, dict):
+        details = usage.get("input_tokens_details") or {}
+        return {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0),
+            "cached": details.get("cached_tokens", 0) or 0}
+    details = getattr(usage, "input_tokens_details", None)
+    return {"input": usage.input_tokens, "output": usage.output_tokens,
+        "cached": (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0}
+
+# Cost in $ of the tokens, with the prices per 1M tokens of the model.
+# The cached tokens are part of the input tokens and are billed at the cached input price.
+def usage_cost(tokens: Dict[str, int], prices: Dict[str, float]) -> float:
+    uncached = tokens["input"] - tokens["cached"]
+    cost = uncached * prices["input"] + tokens["cached"] * prices.get("cached_input", prices["input"]) + tokens["output"] * prices["output"]
+    return cost / 1000000
+
+# The usage of a parsed response, or of a raw response (with_raw_response) whose output may not be parsable
+def response_usage(response):
+    if hasattr(response, "http_response"):
+        return response.http_response.json().get("usage")
+    return getattr(response, "usage", None)
+
+def label_text(labels: Dict[str, str]) -> str:
+    return ",".join(f'{key}="{value}"' for key, value in labels.items())
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.llm_latency: Dict[Tuple[str, str], Histogram] = {}          # (operation, model)
+        self.llm_requests: Dict[Tuple[str, str, str], int] = {}          # (operation, model, outcome)
+        self.llm_tokens: Dict[Tuple[str, str, str], int] = {}            # (operation, model, token type)
+        self.llm_time_to_first: Dict[Tuple[str, str], Histogram] = {}    # (operation, model), streamed requests only
+        self.llm_cost: Dict[Tuple[str, str], float] = {}                 # (operation, model)
+        self.grading: Dict[str, Histogram] = {}                          # cascade stage that decided the feedback
+        self.queue_wait: Dict[str, Histogram] = {}                       # model
+        self.resilience_events: Dict[Tuple[str, str, str], int] = {}     # (operation, model, event)
+        self.script_runs: Dict[str, Histogram] = {}                      # page
+        self.fragment_runs: Dict[str, Histogram] = {}                    # panel, fragment-only reruns
+        self.cold_start: Optional[float] = None
+
+    # Calls the OpenAI request and records its wall time, tokens and outcome ("ok" or the exception name)
+    def observe_llm_call(self, operation: str, model: str, call: Callable):
+        start = perf_counter()
+        outcome = "ok"
+        response = None
+        try:
+            response = call()
+            return response
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            self.record_llm_call(operation, model, perf_counter() - start, outcome,
+                usage_tokens(response_usage(response)) if response is not None else usage_tokens(None))
+
+    def record_llm_call(self, operation: str, model: str, seconds: float, outcome: str, tokens: Dict[str, int]):
+        with self.lock:
+            self.llm_latency.setdefault((operation, model), Histogram()).observe(seconds)
+            key = (operation, model, outcome)
+            self.llm_requests[key] = self.llm_requests.get(key, 0) + 1
+            for token_type, count in tokens.items():
+                key = (operation, model, token_type)
+                self.llm_tokens[key] = self.llm_tokens.get(key, 0) + count
+
+    def record_cost(self, operation: str, model: str, cost: float):
+        with self.lock:
+            self.llm_cost[(operation, model)] = self.llm_cost.get((operation, model), 0.0) + cost
+
+    # Latency quantile of the operation, None until it has min_count observations
+    def llm_latency_quantile(self, operation: str, model: str, q: float, min_count: int) -> Optional[float]:
+        with self.lock:
+            histogram = self.llm_latency.get((operation, model))
+            if histogram is None or len(histogram.recent) < min_count:
+                return None
+            return histogram.quantile(q)
+
+    # Retries, hedged requests, circuit openings, deadlines and fallbacks of the resilience layer
+    def record_resilience_event(self, operation: str, model: str, event: str):
+        with self.lock:
+            key = (operation, model, event)
+            self.resilience_events[key] = self.resilience_events.get(key, 0) + 1
+
+    # Time an OpenAI request waited in the scheduler queue before being sent
+    def record_queue_wait(self, model: str, seconds: float):
+        with self.lock:
+            self.queue_wait.setdefault(model, Histogram()).observe(seconds)
+
+    # Grading time of one answer, by the stage of the grading cascade that decided its feedback:
+    # "precheck" (local, no request), "triage" (invalid answer found by the triage model) or "full" (selected model)
+    def record_grading(self, stage: str, seconds: float):
+        with self.lock:
+            self.grading.setdefault(stage, Histogram()).observe(seconds)
+
+    # Time until the first usable item (e.g. the first question) of a streamed request
+    def record_time_to_first(self, operation: str, model: str, seconds: float):
+        with self.lock:
+            self.llm_time_to_first.setdefault((operation, model), Histogram()).observe(seconds)
+
+    # The first script run of the process is the cold start, it includes the imports and the shared resources
+    def record_script_run(self, page: str, seconds: float):
+        with self.lock:
+            if self.cold_start is None:
+                self.cold_start = seconds
+                return
+            self.script_runs.setdefault(page, Histogram()).observe(seconds)
+
+    # A rerun of a panel (fragment) only, not of the whole script: the server time of an interaction within the panel
+    def record_fragment_run(self, panel: str, seconds: float):
+        with self.lock:
+            self.fragment_runs.setdefault(panel, Histogram()).observe(seconds)
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            llm = []
+            for (operation, model), histogram in sorted(self.llm_latency.items()):
+                outcomes = {outcome: count for (op, mdl, outcome), count in self.llm_requests.items() if (op, mdl) == (operation, model)}
+                tokens = {token_type: count for (op, mdl, token_type), count in self.llm_tokens.items() if (op, mdl) == (operation, model)}
+                llm.append({"operation": operation, "model": model, "latency_seconds": histogram.summary(),
+                    "outcomes": outcomes, "tokens": tokens})
+                llm[-1]["cost"] = self.llm_cost.get((operation, model), 0.0)
+                if (operation, model) in self.llm_time_to_first:
+                    llm[-1]["time_to_first_seconds"] = self.llm_time_to_first[(operation, model)].summary()
+            grading = {stage: histogram.summary() for stage, histogram in sorted(self.grading.items())}
+            queue_wait = {model: histogram.summary() for model, histogram in sorted(self.queue_wait.items())}
+            script_runs = {page: histogram.summary() for page, histogram in sorted(self.script_runs.items())}
+            fragment_runs = {panel: histogram.summary() for panel, histogram in sorted(self.fragment_runs.items())}
+            resilience = [{"operation": op, "model": model, "event": event, "count": count}
+                for (op, model, event), count in sorted(self.resilience_events.items())]
+            return {"timestamp": time(), "cold_start_seconds": self.cold_start, "llm": llm, "grading": grading,
+                "queue_wait": queue_wait, "resilience": resilience, "script_runs": script_runs,
+                "fragment_runs": fragment_runs}
+
+    def prometheus_text(self) -> str:
+        lines: List[str] = []
+
+        def histogram_lines(name: str, help_text: str, histograms: List[Tuple[Dict[str, str], Histogram]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, histogram in histograms:
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append(f'{name}_bucket{{{label_text({**labels, "le": str(bound)})}}} {count}')
+                lines.append(f'{name}_bucket{{{label_text({**labels, "le": "+Inf"})}}} {histogram.count}')
+                lines.append(f"{name}_sum{{{label_text(labels)}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{label_text(labels)}}} {histogram.count}")
+
+        with self.lock:
+            histogram_lines("interview_llm_request_duration_seconds", "Wall time of the OpenAI requests.",
+                [({"operation": op, "model": model}, h) for (op, model), h in sorted(self.llm_latency.items())])
+            histogram_lines("interview_llm_time_to_first_seconds", "Time to the first item of the streamed OpenAI requests.",
+                [({"operation": op, "model": model}, h) for (op, model), h in sorted(self.llm_time_to_first.items())])
+            lines.append("# HELP interview_llm_requests_total OpenAI requests by outcome.")
+            lines.append("# TYPE interview_llm_requests_total counter")
+            for (op, model, outcome), count in sorted(self.llm_requests.items()):
+                lines.append(f"interview_llm_requests_total{{{label_text({'operation': op, 'model': model, 'outcome': outcome})}}} {count}")
+            lines.append("# HELP interview_llm_tokens_total Tokens used by the OpenAI requests.")
+            lines.append("# TYPE interview_llm_tokens_total counter")
+            for (op, model, token_type), count in sorted(self.llm_tokens.items()):
+                lines.append(f"interview_llm_tokens_total{{{label_text({'operation': op, 'model': model, 'type': token_type})}}} {count}")
+            lines.append("# HELP interview_llm_cost_dollars_total Cost of the OpenAI requests, in $.")
+            lines.append("# TYPE interview_llm_cost_dollars_total counter")
+            for (op, model), cost in sorted(self.llm_cost.items()):
+                lines.append(f"interview_llm_cost_dollars_total{{{label_text({'operation': op, 'model': model})}}} {cost}")
+            lines.append("# HELP interview_llm_resilience_events_total Retries, hedges, circuit openings, deadlines and fallbacks.")
+            lines.append("# TYPE interview_llm_resilience_events_total counter")
+            for (op, model, event), count in sorted(self.resilience_events.items()):
+                lines.append(f"interview_llm_resilience_events_total{{{label_text({'operation': op, 'model': model, 'event': event})}}} {count}")
+            histogram_lines("interview_llm_queue_wait_seconds", "Time the OpenAI requests waited for the rate limiter.",
+                [({"model": model}, h) for model, h in sorted(self.queue_wait.items())])
+            histogram_lines("interview_grading_duration_seconds", "Grading time of one answer, by the cascade stage that decided it.",
+                [({"stage": stage}, h) for stage, h in sorted(self.grading.items())])
+            histogram_lines("interview_script_run_duration_seconds", "Duration of the complete runs of the app script.",
+                [({"page": page}, h) for page, h in sorted(self.script_runs.items())])
+            histogram_lines("interview_fragment_run_duration_seconds", "Duration of the reruns of a panel (fragment) alone.",
+                [({"panel": panel}, h) for panel, h in sorted(self.fragment_runs.items())])
+            if self.cold_start is not None:
+                lines.append("# HELP interview_cold_start_seconds Duration of the first script run of the process.")
+                lines.append("# TYPE interview_cold_start_seconds gauge")
+                lines.append(f"interview_cold_start_seconds {self.cold_start}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+_metrics_server_started = False
+_json_log_started = False
+_exporters_lock = threading.Lock()
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = metrics.prometheus_text(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = json.dumps(metrics.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass    # Scrapes are not logged
+
+# Serves /metrics (Prometheus) and /metrics.json on the given port. Started once per process.
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    global _metrics_server_started
+    with _exporters_lock:
+        if _metrics_server_started:
+            return
+        _metrics_server_started = True
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+# Appends a JSON snapshot of the metrics to the file every interval seconds. Started once per process.
+def start_json_log(path: str, interval: float):
+    global _json_log_started
+    with _exporters_lock:
+        if _json_log_started:
+            return
+        _json_log_started = True
+
+    def write_snapshots():
+        while True:
+            sleep(interval)
+            with open(path, "a", encoding="utf-8") as log_file:
+                log_file.write(json.dumps(metrics.snapshot()) + "\n")
+
+    threading.Thread(target=write_snapshots, daemon=True).start()
@@ -0,0 +1,112 @@
+# Configuration of the interview app.
+# Streamlit reruns interview_app.py on every interaction, but this module is imported (and evaluated) only once per process.
+
+default_job_title = "Software Engineer"
+job_description_max_length=2000
+default_question_count = 5
+max_question_count = 20
+answer_max_length=1500
+answer_recomended_max_length=1000
+feedback_max_workers = 8        # Maximum number of feedback requests sent to OpenAI in parallel
+feedback_poll_interval = 1.0    # Seconds between the checks for newly arrived feedback
+question_poll_interval = 0.25   # Seconds between the checks for newly streamed questions
+feedback_max_output_tokens = 400            # Output token limit for the feedback on one answer
+feedback_batch_max_output_tokens = 4000     # Output token limit for one batched feedback request
+cascade_triage_model = 'gpt-4.1-nano'      # Cheap model deciding if the answers are valid, before the selected model
+triage_max_output_tokens = 150              # Output token limit for the triage of one answer
+answer_min_words = 5                        # Shorter answers are rejected without any OpenAI request
+answer_min_unique_word_ratio = 0.3          # Answers repeating the same words more than this are rejected too
+llm_cache_path = ".llm_cache.sqlite3"
+llm_cache_max_entries = 5000                # Least recently used entries above this limit are evicted
+llm_cache_ttl = 7 * 24 * 3600               # Seconds after which a cached response expires
+session_store_backend = "tiered"            # "memory", "sqlite" or "tiered" (in-memory LRU in front of SQLite)
+session_store_path = ".sessions.sqlite3"
+session_store_max_in_memory = 500           # Sessions kept in memory, the least recently used ones above it are dropped
+session_ttl = 24 * 3600                     # Seconds of inactivity after which a session is evicted
+session_eviction_interval = 300             # Seconds between the evictions of the idle sessions
+question_bank_path = "question_bank.sqlite3" # Built by build_question_bank.py
+question_bank_pool_size = 100               # Questions per job title, difficulty level and kind (behavioral/technical)
+question_bank_batch_size = 20               # Questions per request of the builder
+question_bank_dedup_threshold = 0.7         # Estimated Jaccard similarity above which a question is a near-duplicate
+openai_deadlines = {'questions': 60, 'per_question': 30, 'batched': 90, 'triage': 15}  # Seconds per operation, retries included
+openai_max_retries = 2                      # Retries of a request failing with a retryable error (timeout, 429, 5xx)
+openai_backoff_base = 0.5                   # Seconds of the first retry backoff (doubled at each retry, jittered)
+openai_backoff_cap = 8.0                    # Maximum backoff before a retry, in seconds
+hedge_min_samples = 20                      # Requests of an operation needed before its p95 latency is used to hedge
+circuit_failure_threshold = 5               # Failed requests in a row after which the circuit of the model opens
+circuit_reset_timeout = 30                  # Seconds before a probe request is sent to an open circuit
+feedback_retry_delay = 30                   # Seconds before the delayed feedback is requested again
+llm_transport_mode = "live"                 # "live", "record" (saves the OpenAI responses as fixtures) or "replay" (offline). Env: INTERVIEW_LLM_MODE
+llm_fixtures_path = "fixtures/llm"          # Fixture files of the record and replay modes. Env: INTERVIEW_LLM_FIXTURES
+llm_replay_latency = None                   # Seconds per replayed response, None for the recorded latency. Env: INTERVIEW_LLM_REPLAY_LATENCY
+
+metrics_port = None                         # Port of the Prometheus /metrics endpoint, None to disable it
+metrics_log_path = None                     # File receiving periodic JSON snapshots of the metrics, None to disable it
+metrics_log_interval = 60                   # Seconds between two JSON snapshots
+
+difficulty_levels = ["Easy", "Medium", "Hard"]
+
+default_difficulty_level = difficulty_levels[1]  # Medium
+
+DEFAULT_QUESTIONS = [
+    "Can you describe a challenging software project you worked on, detailing the specific obstacles you encountered and the strategies you used to overcome them?",
+    "Tell me about a time you had to adapt to a significant change on a project. How did you manage your response and guide your team through it?",
+    "What programming languages are you most proficient in, and can you provide specific examples of how you've used them to solve complex problems in past projects?",
+    "Walk me through the process you would use to optimize a poorly performing piece of code. How do you identify the issues, and what tools or techniques do you employ?",
+    "Explain a technical problem you've solved that required collaborating with other teams or departments. How did you ensure effective communication and integration across different areas?"
+]
+
+DEFAULT_ANSWERS = [
+    """One of the most challenging projects I worked on was the migration of a large telecom billing system to a new architecture. The codebase had been developed over many years by different teams, with inconsistent standards and limited documentation.
+The main obstacles were:
+- Complex dependencies between legacy modules, making even small changes risky.
+- Performance bottlenecks in database queries that slowed down batch processes.
+- Limited stakeholder alignment, as different departments had conflicting priorities.
+
+To overcome these, I:
+- Mapped critical dependencies using static analysis and documentation workshops, which reduced the “black box” factor.
+- Optimized database queries by introducing indexes, rewriting inefficient SQL, and caching results where possible. This improved batch processing times significantly.
+- Improved communication by setting up regular cross-team syncs and a clear backlog, so priorities became transparent and conflicts could be resolved earlier.
+
+The result was a stable migration with improved performance and clearer ownership of system components.""",
+
+"""On one project, the client changed the core requirements mid-development, which affected the database schema and API contracts. 
+I first analyzed the impact and created a revised implementation plan. I communicated the changes clearly to the team, re-prioritized tasks, and introduced short daily check-ins to track progress. 
+This kept the team aligned and allowed us to deliver the updated system on schedule.""",
+
+"""I’m most proficient in Java, C++, and SQL/PLSQL.
+Java: Built a microservices-based telecom billing system, handling high-volume transactions and implementing REST APIs with Spring.
+C++: Developed performance-critical modules for data processing in a telecom platform, optimizing memory usage and execution speed.
+SQL/PLSQL: Designed complex stored procedures and optimized large-scale queries to improve batch processing times by 40%.""",
+
+"""First, I profile the code to identify bottlenecks using tools like Java Flight Recorder, VisualVM, or SQL execution plans. 
+Then I analyze algorithm efficiency, looking for high-complexity operations or unnecessary loops. 
+I optimize by refactoring logic, caching results, reducing database calls, or using parallel processing where safe. 
+Finally, I benchmark and test to ensure improvements don’t break functionality and achieve measurable performance gains.""",
+
+"""In a telecom billing project, a new reporting feature required coordination between development, database, and operations teams. 
+I organized joint requirement sessions to clarify dependencies, documented integration points, and used shared tickets and daily stand-ups to track progress. 
+Clear communication and agreed-upon interfaces ensured smooth integration and on-time delivery."""
+]
+
+openai_models = ['gpt-4o', 'gpt-4o-mini', 'gpt-4.1', 'gpt-4.1-mini', 'gpt-4.1-nano']
+default_openai_model = 'gpt-4o-mini'
+
+# Rate limits of the OpenAI account per model (requests and tokens per minute), enforced by the process-wide scheduler
+openai_rate_limits = {
+    'gpt-4o': {'rpm': 500, 'tpm': 30000},
+    'gpt-4o-mini': {'rpm': 500, 'tpm': 200000},
+    'gpt-4.1': {'rpm': 500, 'tpm': 30000},
+    'gpt-4.1-mini': {'rpm': 500, 'tpm': 200000},
+    'gpt-4.1-nano': {'rpm': 500, 'tpm': 200000}
+}
+default_openai_rate_limits = {'rpm': 500, 'tpm': 30000}
+
+# The cached input tokens are the prompt prefix already seen by OpenAI, billed at a discount
+openai_price_per_1m_tokens = {
+    'gpt-4o': {'input': 2.5, 'cached_input': 1.25, 'output': 10},
+    'gpt-4o-mini': {'input': 0.15, 'cached_input': 0.075, 'output': 0.60},
+    'gpt-4.1': {'input': 2., 'cached_input': 0.50, 'output': 8.},
+    'gpt-4.1-mini': {'input': 0.40, 'cached_input': 0.10, 'output': 1.60},
+    'gpt-4.1-nano': {'input': 0.10, 'cached_input': 0.025, 'output': 0.40}
+}
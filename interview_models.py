@@ -0,0 +1,23 @@
+from typing import List
+from pydantic import BaseModel
+
+# Define Pydantic models
+class Questions(BaseModel):
+    questions: List[str]
+
+class FeedbackResponse(BaseModel):
+    answer_is_valid: bool
+    guidance: str
+    strengths: List[str]
+    improvements: List[str]
+    class Config:      extra = "ignore"  # silently ignore unknown fields
+
+class FeedbackBatch(BaseModel):
+    feedback: List[FeedbackResponse]
+
+class AnswerTriage(BaseModel):
+    answer_is_valid: bool
+    guidance: str
+
+class TriageBatch(BaseModel):
+    triage: List[AnswerTriage]
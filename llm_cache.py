@@ -0,0 +1,83 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from helper_functions import process_wide
+
+# Persistent cache for the LLM responses, stored in SQLite.
+# The keys are content hashes of everything that influences the response: model, prompt inputs and sampling parameters.
+# The values are the parsed responses serialized as JSON.
+class LLMCache:
+    def __init__(self, path: str, max_entries: int = 5000, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        # One connection shared by all the sessions and worker threads of the process, guarded by the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache (last_access)")
+        self.connection.commit()
+
+    # Returns the cached value, or None if the key is unknown or its entry expired
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self.connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self.connection.commit()
+                self.misses += 1
+                return None
+
+            self.connection.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            self.connection.commit()
+            self.hits += 1
+            return row[0]
+
+    # Stores the value and evicts the least recently used entries above max_entries
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now, now))
+            self.connection.execute("""DELETE FROM llm_cache WHERE key IN (
+                SELECT key FROM llm_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)""", (self.max_entries,))
+            self.connection.commit()
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM llm_cache")
+            self.connection.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            entries = self.connection.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+# Returns the cache stored at path, shared by all the sessions
+@process_wide
+def get_llm_cache(path: str, max_entries: int, ttl_seconds: float) -> LLMCache:
+    return LLMCache(path, max_entries, ttl_seconds)
+
+# Collapses the whitespace, so that answers differing only in spacing share the cache entry
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip()
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def make_cache_key(kind: str, model: str, **inputs) -> str:
+    payload = json.dumps({"kind": kind, "model": model, **inputs}, sort_keys=True, ensure_ascii=False)
+    return text_hash(payload)
@@ -0,0 +1,174 @@
+import codecs
+import glob
+import hashlib
+import json
+import os
+import threading
+from time import monotonic, sleep
+from typing import Callable, Dict, List, Optional
+
+# The transports plug into the HTTP library of the openai client: httpx2 since openai 3, httpx before
+try:
+    import httpx2 as httpx
+except ImportError:
+    import httpx
+
+# HTTP transports under the OpenAI client, to run the app and the benchmarks offline.
+# "record" sends the requests to OpenAI and saves every request/response pair (with its usage and the arrival time
+# of each chunk, so streams keep their timing) to a fixture file. "replay" serves the fixtures without any network,
+# with the recorded latency or a synthetic one. The "live" mode has no transport of its own: see helper_functions.py.
+#
+# A fixture file holds the recordings of one request, its name is the hash of the request (method, path and JSON body).
+# Replaying an identical request serves its recordings in turn. A request that was not recorded
+# (e.g. an answer typed differently) is served a recording of a request of the same shape (model, output format, streamed or not).
+
+def request_body(request: httpx.Request) -> Dict:
+    content = request.read()
+    return json.loads(content) if content else {}
+
+def request_key(method: str, path: str, body: Dict) -> str:
+    canonical = json.dumps([method, path, body], sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+
+def request_shape(method: str, path: str, body: Dict) -> str:
+    output_format = (body.get("text") or {}).get("format") or {}
+    return " ".join([method, path, str(body.get("model", "")), str(output_format.get("name", "")),
+        "stream" if body.get("stream") else "parse"])
+
+# The usage of a recorded response: in the JSON body, or in the "response.completed" event of a stream
+def recorded_usage(text: str) -> Optional[Dict]:
+    try:
+        return json.loads(text).get("usage")
+    except ValueError:
+        pass
+    for line in text.splitlines():
+        if line.startswith("data: ") and '"response.completed"' in line:
+            return json.loads(line[len("data: "):]).get("response", {}).get("usage")
+    return None
+
+class FixtureStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fixtures: Dict[str, Dict] = {}     # request key -> fixture
+        self.shapes: Dict[str, List[str]] = {}  # request shape -> request keys
+        self.replayed: Dict[str, int] = {}      # request key -> recordings served
+        os.makedirs(path, exist_ok=True)
+        for file_name in sorted(glob.glob(os.path.join(path, "*.json"))):
+            with open(file_name, encoding="utf-8") as fixture_file:
+                fixture = json.load(fixture_file)
+            key = os.path.splitext(os.path.basename(file_name))[0]
+            self.fixtures[key] = fixture
+            self.shapes.setdefault(fixture["shape"], []).append(key)
+
+    def add(self, method: str, path: str, body: Dict, status: int, content_type: str, chunks: List[List]):
+        key = request_key(method, path, body)
+        recording = {"status": status, "content_type": content_type,
+            "usage": recorded_usage("".join(text for _, text in chunks)), "chunks": chunks}
+        with self.lock:
+            if key not in self.fixtures:
+                shape = request_shape(method, path, body)
+                self.fixtures[key] = {"request": {"method": method, "path": path, "body": body}, "shape": shape, "recordings": []}
+                self.shapes.setdefault(shape, []).append(key)
+            self.fixtures[key]["recordings"].append(recording)
+            file_name = os.path.join(self.path, f"{key}.json")
+            with open(file_name + ".tmp", "w", encoding="utf-8") as fixture_file:
+                json.dump(self.fixtures[key], fixture_file, ensure_ascii=False, indent=1)
+            os.replace(file_name + ".tmp", file_name)
+
+    # The next recording to serve for the request, None if no request of its shape was recorded.
+    # The choice only depends on the request and on how many times it was replayed, so a replay is deterministic.
+    def next_recording(self, method: str, path: str, body: Dict) -> Optional[Dict]:
+        key = request_key(method, path, body)
+        with self.lock:
+            fixture = self.fixtures.get(key)
+            if fixture is None:
+                candidates = self.shapes.get(request_shape(method, path, body))
+                if not candidates:
+                    return None
+                fixture = self.fixtures[candidates[int(key, 16) % len(candidates)]]
+            served = self.replayed.get(key, 0)
+            self.replayed[key] = served + 1
+            return fixture["recordings"][served % len(fixture["recordings"])]
+
+# Passes the chunks of the response through, and records them with their arrival time once the response is complete
+class RecordingStream(httpx.SyncByteStream):
+    def __init__(self, stream, start: float, on_complete: Callable[[List[List]], None]):
+        self.stream = stream
+        self.start = start
+        self.on_complete = on_complete
+
+    def __iter__(self):
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        chunks = []
+        for chunk in self.stream:
+            chunks.append([round(monotonic() - self.start, 4), decoder.decode(chunk)])
+            yield chunk
+        if chunks:
+            chunks[-1][1] += decoder.decode(b"", final=True)
+        self.on_complete(chunks)
+
+    def close(self):
+        self.stream.close()
+
+class RecordingTransport(httpx.BaseTransport):
+    def __init__(self, store: FixtureStore, inner: Optional[httpx.BaseTransport] = None):
+        self.store = store
+        self.inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request_body(request)
+        request.headers["Accept-Encoding"] = "identity"     # The fixtures are plain text
+        start = monotonic()
+        response = self.inner.handle_request(request)
+        content_type = response.headers.get("content-type", "")
+        stream = RecordingStream(response.stream, start,
+            lambda chunks: self.store.add(request.method, request.url.path, body, response.status_code, content_type, chunks))
+        return httpx.Response(response.status_code, headers=response.headers, stream=stream, extensions=response.extensions)
+
+# Serves the recorded chunks at their recorded time since the request, scaled to the synthetic latency if any
+class ReplayStream(httpx.SyncByteStream):
+    def __init__(self, chunks: List[List], scale: float):
+        self.chunks = chunks
+        self.scale = scale
+        self.start = monotonic()
+
+    def __iter__(self):
+        for offset, text in self.chunks:
+            delay = offset * self.scale - (monotonic() - self.start)
+            if delay > 0:
+                sleep(delay)
+            yield text.encode("utf-8")
+
+class ReplayTransport(httpx.BaseTransport):
+    # latency: seconds per response (the chunks of a stream keep their relative timing), None for the recorded latency
+    def __init__(self, store: FixtureStore, latency: Optional[float] = None):
+        self.store = store
+        self.latency = latency
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        body = request_body(request)
+        recording = self.store.next_recording(request.method, request.url.path, body)
+        if recording is None:
+            message = f"No recorded response for '{request_shape(request.method, request.url.path, body)}' in {self.store.path}"
+            return httpx.Response(404, json={"error": {"message": message, "type": "invalid_request_error"}}, request=request)
+
+        chunks = recording["chunks"] or [[0.0, ""]]
+        duration = chunks[-1][0]
+        scale = 1.0
+        if self.latency is not None:
+            if duration > 0:
+                scale = self.latency / duration
+            else:
+                chunks = [[self.latency, text] for _, text in chunks]     # No recorded timing: all at the synthetic latency
+        return httpx.Response(recording["status"], headers={"content-type": recording["content_type"]},
+            stream=ReplayStream(chunks, scale), request=request)
+
+# The transport of the "record" or "replay" mode, with the fixtures in the given directory
+def make_transport(mode: str, fixtures_path: str, replay_latency: Optional[float]) -> httpx.BaseTransport:
+    store = FixtureStore(fixtures_path)
+    if mode == "record":
+        return RecordingTransport(store)
+    if mode == "replay":
+        return ReplayTransport(store, replay_latency)
+    raise ValueError(f"Unknown LLM transport mode: {mode}")
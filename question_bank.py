@@ -0,0 +1,150 @@
+import hashlib
+import random
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from helper_functions import process_wide
+
+# Question bank: pools of questions pre-generated offline per (job title, difficulty level, kind) by build_question_bank.py.
+# Each question has a position 0..n-1 in its pool, and the pool sizes are stored apart, so sampling k questions
+# reads k rows by primary key, whatever the size of the pools.
+
+QUESTION_KINDS = ("behavioral", "technical")
+BEHAVIORAL_SHARE = 0.4      # Same 40/60 split as the generated questions
+
+MINHASH_PRIME = (1 << 61) - 1
+
+def normalize_job_title(job_title: str) -> str:
+    return re.sub(r"\s+", " ", job_title).strip().lower()
+
+# Number of behavioral and technical questions of an interview
+def question_split(question_count: int) -> Dict[str, int]:
+    behavioral_count = round(question_count * BEHAVIORAL_SHARE)
+    return {"behavioral": behavioral_count, "technical": question_count - behavioral_count}
+
+# MinHash signatures of the character shingles of a text.
+# The share of equal values in two signatures estimates the Jaccard similarity of the two shingle sets.
+class MinHasher:
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        rng = random.Random(seed)
+        self.shingle_size = shingle_size
+        self.permutations = [(rng.randrange(1, MINHASH_PRIME), rng.randrange(0, MINHASH_PRIME)) for _ in range(num_perm)]
+
+    # The text is compared without case, punctuation and repeated spaces, so rewordings of the same question stay close
+    def shingles(self, text: str) -> Set[str]:
+        text = " ".join(re.findall(r"\w+", text.lower()))
+        if len(text) <= self.shingle_size:
+            return {text}
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+            for shingle in self.shingles(text)]
+        return tuple(min((a * h + b) % MINHASH_PRIME for h in hashes) for a, b in self.permutations)
+
+# Finds the near-duplicates of a question with locality-sensitive hashing: the signatures are cut in bands,
+# and only the questions sharing a band with the new one are compared to it.
+class NearDuplicateIndex:
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16):
+        self.threshold = threshold
+        self.hasher = MinHasher(num_perm)
+        self.rows = num_perm // bands
+        self.buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self.signatures: List[Tuple[int, ...]] = []
+
+    def similarity(self, a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        return sum(x == y for x, y in zip(a, b)) / len(a)
+
+    def is_duplicate(self, signature: Tuple[int, ...]) -> bool:
+        candidates = set()
+        for band, buckets in enumerate(self.buckets):
+            candidates.update(buckets.get(signature[band * self.rows:(band + 1) * self.rows], ()))
+        return any(self.similarity(signature, self.signatures[i]) >= self.threshold for i in candidates)
+
+    # Adds the text to the index. Returns False if it is a near-duplicate of a text already added.
+    def add(self, text: str) -> bool:
+        signature = self.hasher.signature(text)
+        if self.is_duplicate(signature):
+            return False
+        index = len(self.signatures)
+        self.signatures.append(signature)
+        for band, buckets in enumerate(self.buckets):
+            buckets.setdefault(signature[band * self.rows:(band + 1) * self.rows], []).append(index)
+        return True
+
+class QuestionBank:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        # One connection shared by all the sessions of the process, guarded by the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS question_pools (
+            job_title TEXT NOT NULL,
+            difficulty_level TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            PRIMARY KEY (job_title, difficulty_level, kind)) WITHOUT ROWID""")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS questions (
+            job_title TEXT NOT NULL,
+            difficulty_level TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            question TEXT NOT NULL,
+            PRIMARY KEY (job_title, difficulty_level, kind, position)) WITHOUT ROWID""")
+        self.connection.commit()
+
+    def pool_size(self, job_title: str, difficulty_level: str, kind: str) -> int:
+        with self.lock:
+            row = self.connection.execute("SELECT size FROM question_pools WHERE job_title = ? AND difficulty_level = ? AND kind = ?",
+                (normalize_job_title(job_title), difficulty_level, kind)).fetchone()
+        return row[0] if row else 0
+
+    def pool(self, job_title: str, difficulty_level: str, kind: str) -> List[str]:
+        with self.lock:
+            rows = self.connection.execute("""SELECT question FROM questions WHERE job_title = ? AND difficulty_level = ? AND kind = ?
+                ORDER BY position""", (normalize_job_title(job_title), difficulty_level, kind)).fetchall()
+        return [row[0] for row in rows]
+
+    # Appends the questions at the end of the pool
+    def add(self, job_title: str, difficulty_level: str, kind: str, questions: Iterable[str]):
+        key = (normalize_job_title(job_title), difficulty_level, kind)
+        with self.lock:
+            row = self.connection.execute("SELECT size FROM question_pools WHERE job_title = ? AND difficulty_level = ? AND kind = ?", key).fetchone()
+            size = row[0] if row else 0
+            for question in questions:
+                self.connection.execute("INSERT INTO questions VALUES (?, ?, ?, ?, ?)", (*key, size, question))
+                size += 1
+            self.connection.execute("INSERT OR REPLACE INTO question_pools VALUES (?, ?, ?, ?)", (*key, size))
+            self.connection.commit()
+
+    # Returns question_count random questions with the behavioral/technical split, behavioral first,
+    # or None if the pools of this job title and difficulty level are too small.
+    def sample(self, job_title: str, difficulty_level: str, question_count: int) -> Optional[List[str]]:
+        job_title = normalize_job_title(job_title)
+        questions: List[str] = []
+        with self.lock:
+            for kind, count in question_split(question_count).items():
+                if count == 0:
+                    continue
+                row = self.connection.execute("SELECT size FROM question_pools WHERE job_title = ? AND difficulty_level = ? AND kind = ?",
+                    (job_title, difficulty_level, kind)).fetchone()
+                if row is None or row[0] < count:
+                    return None
+                positions = random.sample(range(row[0]), count)
+                rows = self.connection.execute(f"""SELECT position, question FROM questions
+                    WHERE job_title = ? AND difficulty_level = ? AND kind = ? AND position IN ({",".join("?" * count)})""",
+                    (job_title, difficulty_level, kind, *positions)).fetchall()
+                by_position = dict(rows)
+                questions.extend(by_position[position] for position in positions)
+        return questions
+
+    def stats(self) -> List[Tuple[str, str, str, int]]:
+        with self.lock:
+            return self.connection.execute("SELECT job_title, difficulty_level, kind, size FROM question_pools ORDER BY 1, 2, 3").fetchall()
+
+# Returns the question bank stored at path, shared by all the sessions
+@process_wide
+def get_question_bank(path: str) -> QuestionBank:
+    return QuestionBank(path)
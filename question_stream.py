@@ -0,0 +1,72 @@
+import json
+import re
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional
+
+from rate_limiter import DeadlineExceededError
+
+# Streaming of the generated questions: the Questions JSON object arrives in text deltas,
+# and each question is available as soon as its string is complete, before the end of the response.
+
+QUESTIONS_ARRAY_START = re.compile(r'"questions"\s*:\s*\[')
+
+# Extracts the strings of the "questions" array from the JSON text while it is streamed
+class QuestionStreamParser:
+    def __init__(self):
+        self.text = ""
+        self.position: Optional[int] = None        # Next character to scan, None until the array starts
+        self.string_start: Optional[int] = None    # Opening quote of the string being read
+        self.escaped = False
+        self.done = False
+
+    # Returns the questions completed by this delta
+    def feed(self, delta: str) -> List[str]:
+        self.text += delta
+        if self.position is None:
+            match = QUESTIONS_ARRAY_START.search(self.text)
+            if match is None:
+                return []
+            self.position = match.end()
+
+        questions = []
+        while not self.done and self.position < len(self.text):
+            char = self.text[self.position]
+            if self.string_start is None:
+                if char == '"':
+                    self.string_start = self.position
+                elif char == "]":
+                    self.done = True
+            elif self.escaped:
+                self.escaped = False
+            elif char == "\\":
+                self.escaped = True
+            elif char == '"':
+                questions.append(json.loads(self.text[self.string_start:self.position + 1]))
+                self.string_start = None
+            self.position += 1
+        return questions
+
+# Runs the streamed request with the Responses streaming API and appends each question to `questions` as soon as
+# it is complete. `timing` gets the time to the first question ("first") and the total generation time ("total").
+# Meant to run in a worker thread: the script thread reads `questions` while it fills up.
+# The stream stops with DeadlineExceededError at deadline_at (monotonic() time), so no question is added after it.
+# Returns the final response, for the usage.
+def stream_questions(client, questions: List[str], timing: Dict[str, float], deadline_at: Optional[float] = None, **request):
+    start = perf_counter()
+    parser = QuestionStreamParser()
+    with client.responses.stream(**request) as stream:
+        for event in stream:
+            if deadline_at is not None and monotonic() > deadline_at:
+                raise DeadlineExceededError("The question stream did not finish before the deadline")
+            if event.type == "response.output_text.delta":
+                for question in parser.feed(event.delta):
+                    timing.setdefault("first", perf_counter() - start)
+                    questions.append(question)
+        response = stream.get_final_response()
+
+    # The parsed response is the reference, in case the incremental parsing missed a question
+    parsed = response.output_parsed.questions if response.output_parsed is not None else []
+    questions.extend(parsed[len(questions):])
+    timing.setdefault("first", perf_counter() - start)
+    timing["total"] = perf_counter() - start
+    return response
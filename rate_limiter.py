@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict, deque
+from time import monotonic
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from helper_functions import process_wide
+
+# Process-wide scheduler of the OpenAI requests of all the sessions.
+# Each model has two token buckets, one for the requests per minute and one for the tokens per minute,
+# so the requests wait here instead of failing with 429 errors. The waiting requests are served round-robin
+# across the sessions: a session grading 20 answers gets one request in turn with the other sessions.
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.level = per_minute
+        self.updated = monotonic()
+
+    def refill(self):
+        now = monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # Seconds until the amount is available (0 if it is available now)
+    def wait_time(self, amount: float) -> float:
+        self.refill()
+        return max(0.0, (min(amount, self.capacity) - self.level) / self.rate)
+
+    # The level may become negative: a request that used more than estimated delays the next ones
+    def consume(self, amount: float):
+        self.refill()
+        self.level -= amount
+
+# The deadline of the request passed (while it waited in the queue, or while it was sent)
+class DeadlineExceededError(Exception):
+    pass
+
+# The deadline passed before the request was sent: it says nothing about the provider
+class QueueDeadlineError(DeadlineExceededError):
+    pass
+
+# The threads of the requests waiting in a queue, not sent yet (see is_waiting())
+_waiting_threads: Set[int] = set()
+
+# Rough token count of a request before sending it: ~4 characters per input token, plus the output token limit
+def estimate_request_tokens(input_messages, max_output_tokens: Optional[int]) -> int:
+    if isinstance(input_messages, str):
+        characters = len(input_messages)
+    else:
+        characters = sum(len(message.get("content", "")) for message in input_messages)
+    return characters // 4 + (max_output_tokens or 0)
+
+class FairScheduler:
+    def __init__(self, limits: Dict[str, Dict[str, int]], default_limits: Dict[str, int]):
+        self.limits = limits
+        self.default_limits = default_limits
+        self.condition = threading.Condition()
+        self.buckets: Dict[str, Tuple[TokenBucket, TokenBucket]] = {}       # model -> (requests, tokens)
+        # model -> session -> waiting tickets. The order of the sessions is the round-robin order.
+        self.queues: Dict[str, "OrderedDict[str, deque]"] = {}
+
+    def model_buckets(self, model: str) -> Tuple[TokenBucket, TokenBucket]:
+        if model not in self.buckets:
+            limits = self.limits.get(model, self.default_limits)
+            self.buckets[model] = (TokenBucket(limits["rpm"]), TokenBucket(limits["tpm"]))
+        return self.buckets[model]
+
+    # Blocks until the request may be sent. Returns the time spent waiting, in seconds.
+    # Raises QueueDeadlineError if the request is still waiting at deadline_at (monotonic() time): it leaves the queue.
+    def acquire(self, session_id: str, model: str, estimated_tokens: int, deadline_at: Optional[float] = None) -> float:
+        start = monotonic()
+        ticket = object()
+        with self.condition:
+            queue = self.queues.setdefault(model, OrderedDict())
+            queue.setdefault(session_id, deque()).append(ticket)
+            requests_bucket, tokens_bucket = self.model_buckets(model)
+            _waiting_threads.add(threading.get_ident())
+            try:
+                while True:
+                    remaining = deadline_at - monotonic() if deadline_at is not None else None
+                    if remaining is not None and remaining <= 0:
+                        self.leave_queue(queue, session_id, ticket)
+                        raise QueueDeadlineError(f"The request waited {monotonic() - start:.1f} s in the {model} queue")
+                    first_session, tickets = next(iter(queue.items()))
+                    if first_session == session_id and tickets[0] is ticket:
+                        wait = max(requests_bucket.wait_time(1), tokens_bucket.wait_time(estimated_tokens))
+                        if wait <= 0:
+                            break
+                        self.condition.wait(wait if remaining is None else min(wait, remaining))
+                    else:
+                        self.condition.wait(remaining)
+            finally:
+                _waiting_threads.discard(threading.get_ident())
+
+            requests_bucket.consume(1)
+            tokens_bucket.consume(estimated_tokens)
+            tickets.popleft()
+            del queue[session_id]
+            if tickets:
+                queue[session_id] = tickets     # The next request of this session waits for the other sessions
+            self.condition.notify_all()
+        return monotonic() - start
+
+    def leave_queue(self, queue: "OrderedDict[str, deque]", session_id: str, ticket):
+        tickets = queue[session_id]
+        tickets.remove(ticket)
+        if not tickets:
+            del queue[session_id]
+        self.condition.notify_all()     # The next request may be first now
+
+    # Corrects the token bucket with the tokens actually used by the request
+    def complete(self, model: str, estimated_tokens: int, used_tokens: int):
+        with self.condition:
+            self.model_buckets(model)[1].consume(used_tokens - estimated_tokens)
+            self.condition.notify_all()
+
+    # Position of the next request of the session in the queue (1 = next to be sent), None if it has no waiting request
+    def queue_position(self, session_id: str) -> Optional[int]:
+        with self.condition:
+            positions = [list(queue).index(session_id) + 1 for queue in self.queues.values() if session_id in queue]
+        return min(positions) if positions else None
+
+    def waiting_requests(self, session_id: Optional[str] = None) -> int:
+        with self.condition:
+            return sum(len(tickets) for queue in self.queues.values() for session, tickets in queue.items()
+                if session_id is None or session == session_id)
+
+# True while the request of the thread waits in the queue of a scheduler
+def is_waiting(thread_id: int) -> bool:
+    return thread_id in _waiting_threads
+
+_current_session = threading.local()
+
+# Returns the scheduler of these limits, shared by all the sessions
+@process_wide
+def get_scheduler(limits: Dict[str, Dict[str, int]], default_limits: Dict[str, int]) -> FairScheduler:
+    return FairScheduler(limits, default_limits)
+
+# The session of the requests sent by the current thread.
+# The worker threads have no access to st.session_state, so the session is passed with run_in_session().
+def set_current_session(session_id: str):
+    _current_session.id = session_id
+
+def current_session() -> str:
+    return getattr(_current_session, "id", "")
+
+def run_in_session(session_id: str, function: Callable, *args):
+    set_current_session(session_id)
+    return function(*args)
@@ -0,0 +1,212 @@
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from helper_functions import process_wide
+from rate_limiter import DeadlineExceededError, QueueDeadlineError, current_session, is_waiting, run_in_session
+
+# Resilience of the OpenAI requests: every request has a deadline, the retryable errors are retried with jittered
+# exponential backoff within the deadline, and a slow request can be hedged (a duplicate is sent once the p95 latency
+# has passed, the first result wins). A circuit breaker per model stops sending requests when the provider is degraded,
+# so the app falls back at once instead of waiting for every request to time out.
+
+# HTTP statuses worth retrying: timeout, conflict, rate limit and server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    def __init__(self, model: str):
+        super().__init__(f"Circuit open for {model}: the provider is degraded")
+        self.model = model
+
+# Timeouts, connection errors, rate limits and server errors. The openai exceptions are recognized by their attributes,
+# so that this module does not import openai (its import is slow and deferred, see helper_functions.py).
+def is_retryable(error: Exception) -> bool:
+    if type(error).__name__ in ("APITimeoutError", "APIConnectionError", "TimeoutError"):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUSES
+
+# The errors meaning that the provider is degraded, or too busy for the request to be sent in time: the app falls back
+# instead of failing
+def is_provider_failure(error: Exception) -> bool:
+    return isinstance(error, (CircuitOpenError, DeadlineExceededError)) or is_retryable(error)
+
+# Closed: the requests are sent. Open (after failure_threshold failures in a row): they fail at once with CircuitOpenError.
+# Half-open (reset_timeout seconds later): one probe request is sent, its outcome closes or reopens the circuit.
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if monotonic() - self.opened_at < self.reset_timeout or self.probing:
+                return False
+            self.probing = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def release_probe(self):
+        with self.lock:
+            self.probing = False
+
+    # Returns True if this failure opened the circuit
+    def record_failure(self) -> bool:
+        with self.lock:
+            self.failures += 1
+            was_open = self.opened_at is not None
+            if self.probing or self.failures >= self.failure_threshold:
+                self.opened_at = monotonic()
+            self.probing = False
+            return self.opened_at is not None and not was_open
+
+# Full jitter: a random delay up to the exponential backoff, so the retries of concurrent sessions do not stay in step
+def backoff_delay(retry: int, base: float, cap: float) -> float:
+    return random.uniform(0, min(cap, base * 2 ** retry))
+
+# The seconds left before deadline_at (monotonic() time), for the timeout of a request. Raises QueueDeadlineError if none.
+def time_left(deadline_at: float) -> float:
+    remaining = deadline_at - monotonic()
+    if remaining <= 0:
+        raise QueueDeadlineError("The deadline passed before the request was sent")
+    return remaining
+
+# Sends the request with attempt(deadline_at) in a worker thread, and a duplicate once hedge_delay has passed (None: no
+# hedging). Returns the first successful result, or raises DeadlineExceededError at deadline_at, even if the request
+# is still running. The results of the other requests (the loser of a hedge, a request finishing after the deadline)
+# go to on_extra_result: their tokens are paid anyway.
+# Raises QueueDeadlineError instead if none of the requests was sent by the deadline (they all waited in the queue).
+def deadline_call(attempt: Callable[[float], Any], deadline_at: float, hedge_delay: Optional[float],
+        on_hedge: Callable[[], None], on_extra_result: Callable[[Any], None]):
+    session_id = current_session()      # The worker threads send the requests on behalf of the same session
+    threads: Dict[int, int] = {}        # request -> thread running it
+
+    def run_attempt(request: int):
+        threads[request] = threading.get_ident()
+        return run_in_session(session_id, attempt, deadline_at)
+
+    executor = ThreadPoolExecutor(max_workers=2)
+    futures = [executor.submit(run_attempt, 0)]
+    if hedge_delay is not None:
+        done, _ = wait(futures, timeout=hedge_delay)
+        if not done:
+            on_hedge()
+            futures.append(executor.submit(run_attempt, 1))
+    executor.shutdown(wait=False)
+
+    def count_other_results(winner=None):
+        for other in futures:
+            if other is not winner:
+                other.add_done_callback(lambda f: on_extra_result(f.result()) if f.exception() is None else None)
+
+    pending = set(futures)
+    error: Optional[Exception] = None
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline_at - monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            count_other_results()
+            if all(request not in threads or is_waiting(threads[request]) for request, future in enumerate(futures) if future in pending):
+                raise QueueDeadlineError("The request was still waiting in the queue at the deadline")
+            raise DeadlineExceededError("No response before the deadline")
+        for future in done:
+            if future.exception() is None:
+                count_other_results(future)
+                return future.result()
+            error = future.exception()
+    raise error
+
+class ResilientCaller:
+    def __init__(self, max_retries: int, backoff_base: float, backoff_cap: float, failure_threshold: int, reset_timeout: float):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.breakers: Dict[str, CircuitBreaker] = {}     # model
+        self.extra_results: Dict[str, List[Tuple[str, Any]]] = {}     # session -> (operation, result) of the unused requests
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        with self.lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self.breakers[model]
+
+    # Calls attempt(deadline_at) until it succeeds, within the deadline (seconds) of the operation: deadline_at is the
+    # monotonic() time the attempt must be done by (its queue wait included), see time_left().
+    # hedge_delay: send a duplicate request after this many seconds (None: no hedging).
+    # can_retry: tells if the request may still be retried (e.g. not once a stream delivered part of its output).
+    # on_event: notified of the "retry", "hedge", "circuit_open" and "deadline" events, for the metrics.
+    def call(self, operation: str, model: str, attempt: Callable[[float], Any], deadline: float,
+            hedge_delay: Optional[float] = None, can_retry: Callable[[], bool] = lambda: True,
+            on_event: Callable[[str], None] = lambda event: None):
+        breaker = self.breaker(model)
+        deadline_at = monotonic() + deadline
+        session_id = current_session()
+        for retry in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(model)
+            hedge = hedge_delay if hedge_delay is not None and hedge_delay < deadline_at - monotonic() else None
+            try:
+                result = deadline_call(attempt, deadline_at, hedge, lambda: on_event("hedge"),
+                    lambda extra: self.add_extra_result(session_id, operation, extra))
+            except Exception as e:
+                if isinstance(e, QueueDeadlineError):
+                    breaker.release_probe()     # Not sent: the local queue is busy, the provider may be fine
+                    on_event("deadline")
+                    raise
+                if not is_retryable(e) and not isinstance(e, DeadlineExceededError):
+                    breaker.release_probe()     # Not a provider failure (e.g. a bad request): the circuit is unchanged
+                    raise
+                if breaker.record_failure():
+                    on_event("circuit_open")
+                delay = backoff_delay(retry, self.backoff_base, self.backoff_cap)
+                out_of_time = monotonic() + delay >= deadline_at
+                if out_of_time:
+                    on_event("deadline")
+                if retry == self.max_retries or not can_retry() or out_of_time:
+                    raise
+                on_event("retry")
+                sleep(delay)
+                continue
+            breaker.record_success()
+            return result
+
+    def circuit_states(self) -> Dict[str, str]:
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {model: breaker.state for model, breaker in sorted(breakers.items())}
+
+    def add_extra_result(self, session_id: str, operation: str, result):
+        with self.lock:
+            self.extra_results.setdefault(session_id, []).append((operation, result))
+
+    # The results of the session's requests that were paid but not used (hedges, late responses) since the last call, for the cost accounting
+    def take_extra_results(self, session_id: str) -> List[Tuple[str, Any]]:
+        with self.lock:
+            return self.extra_results.pop(session_id, [])
+
+# Returns the resilient caller of these settings: its circuit breakers are shared by all the sessions
+@process_wide
+def get_resilient_caller(max_retries: int, backoff_base: float, backoff_cap: float,
+        failure_threshold: int, reset_timeout: float) -> ResilientCaller:
+    return ResilientCaller(max_retries, backoff_base, backoff_cap, failure_threshold, reset_timeout)
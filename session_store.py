@@ -0,0 +1,225 @@
+import json
+import secrets
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from helper_functions import process_wide
+
+# Server-side store of the interview sessions, so that an interview survives a browser refresh.
+# A session is identified by a random token (kept in the URL) and stored as compressed JSON.
+# The stores are interchangeable: in memory (LRU), SQLite, or the LRU in front of SQLite ("tiered").
+# Idle sessions are evicted after the TTL.
+
+def new_session_token() -> str:
+    return secrets.token_urlsafe(16)
+
+def encode_state(state: Dict) -> bytes:
+    return zlib.compress(json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+def decode_state(blob: bytes) -> Dict:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+# Approximate memory used by an object and everything it references
+def approximate_size(obj, seen: Optional[set] = None) -> int:
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(approximate_size(key, seen) + approximate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(approximate_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += approximate_size(vars(obj), seen)
+    return size
+
+# The saves and updates of the sessions are serialized, so an update made from a worker thread does not interleave
+# with a save of the script thread
+_write_lock = threading.Lock()
+
+class SessionStore(ABC):
+    def save(self, token: str, state: Dict) -> int:
+        blob = encode_state(state)
+        with _write_lock:
+            self.put(token, blob)
+        return len(blob)
+
+    # Changes the stored state of the session with change(state), which returns the new state (None: no change).
+    # For the worker threads, which have no access to st.session_state.
+    def update(self, token: str, change: Callable[[Dict], Optional[Dict]]):
+        with _write_lock:
+            blob = self.get(token)
+            state = change(decode_state(blob)) if blob is not None else None
+            if state is not None:
+                self.put(token, encode_state(state))
+
+    @abstractmethod
+    def get(self, token: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def put(self, token: str, blob: bytes):
+        pass
+
+    @abstractmethod
+    def delete(self, token: str):
+        pass
+
+    # Removes the sessions idle for more than the TTL. Returns the number of sessions removed.
+    @abstractmethod
+    def evict_idle(self) -> int:
+        pass
+
+    # Number of sessions and their total size in bytes
+    @abstractmethod
+    def stats(self) -> Tuple[int, int]:
+        pass
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, max_sessions: int, ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()     # least recently used first
+
+    def get(self, token: str) -> Optional[bytes]:
+        now = time.time()
+        with self.lock:
+            entry = self.sessions.get(token)
+            if entry is None:
+                return None
+            if now - entry[1] > self.ttl_seconds:
+                del self.sessions[token]
+                return None
+            self.sessions[token] = (entry[0], now)
+            self.sessions.move_to_end(token)
+            return entry[0]
+
+    def put(self, token: str, blob: bytes):
+        with self.lock:
+            self.sessions[token] = (blob, time.time())
+            self.sessions.move_to_end(token)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
+
+    def delete(self, token: str):
+        with self.lock:
+            self.sessions.pop(token, None)
+
+    def evict_idle(self) -> int:
+        limit = time.time() - self.ttl_seconds
+        with self.lock:
+            idle = [token for token, (_, last_access) in self.sessions.items() if last_access < limit]
+            for token in idle:
+                del self.sessions[token]
+        return len(idle)
+
+    def stats(self) -> Tuple[int, int]:
+        with self.lock:
+            return len(self.sessions), sum(len(blob) for blob, _ in self.sessions.values())
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path: str, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.lock = threading.Lock()
+        # One connection shared by all the sessions of the process, guarded by the lock
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS interview_sessions (
+            token TEXT PRIMARY KEY,
+            state BLOB NOT NULL,
+            last_access REAL NOT NULL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS interview_sessions_last_access ON interview_sessions (last_access)")
+        self.connection.commit()
+
+    def get(self, token: str) -> Optional[bytes]:
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute("SELECT state FROM interview_sessions WHERE token = ? AND last_access >= ?",
+                (token, now - self.ttl_seconds)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE interview_sessions SET last_access = ? WHERE token = ?", (now, token))
+            self.connection.commit()
+            return row[0]
+
+    def put(self, token: str, blob: bytes):
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO interview_sessions (token, state, last_access) VALUES (?, ?, ?)",
+                (token, blob, time.time()))
+            self.connection.commit()
+
+    def delete(self, token: str):
+        with self.lock:
+            self.connection.execute("DELETE FROM interview_sessions WHERE token = ?", (token,))
+            self.connection.commit()
+
+    def evict_idle(self) -> int:
+        with self.lock:
+            cursor = self.connection.execute("DELETE FROM interview_sessions WHERE last_access < ?", (time.time() - self.ttl_seconds,))
+            self.connection.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Tuple[int, int]:
+        with self.lock:
+            count, size = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM interview_sessions").fetchone()
+        return count, size
+
+# The recently used sessions are served from memory, all of them are written through to the persistent store
+class TieredSessionStore(SessionStore):
+    def __init__(self, memory: MemorySessionStore, persistent: SessionStore):
+        self.memory = memory
+        self.persistent = persistent
+
+    def get(self, token: str) -> Optional[bytes]:
+        blob = self.memory.get(token)
+        if blob is None:
+            blob = self.persistent.get(token)
+            if blob is not None:
+                self.memory.put(token, blob)
+        return blob
+
+    def put(self, token: str, blob: bytes):
+        self.memory.put(token, blob)
+        self.persistent.put(token, blob)
+
+    def delete(self, token: str):
+        self.memory.delete(token)
+        self.persistent.delete(token)
+
+    def evict_idle(self) -> int:
+        self.memory.evict_idle()
+        return self.persistent.evict_idle()
+
+    def stats(self) -> Tuple[int, int]:
+        return self.persistent.stats()
+
+_last_eviction = 0.0
+_eviction_lock = threading.Lock()
+
+# Returns the session store of these settings, shared by all the sessions.
+# The backend is "memory", "sqlite" or "tiered" (memory LRU in front of SQLite).
+@process_wide
+def get_session_store(backend: str, path: str, max_in_memory: int, ttl_seconds: float) -> SessionStore:
+    if backend == "memory":
+        return MemorySessionStore(max_in_memory, ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteSessionStore(path, ttl_seconds)
+    if backend == "tiered":
+        return TieredSessionStore(MemorySessionStore(max_in_memory, ttl_seconds), SQLiteSessionStore(path, ttl_seconds))
+    raise ValueError(f"Unknown session store backend: {backend}")
+
+# Evicts the idle sessions, at most once per interval for the whole process
+def evict_idle_sessions(store: SessionStore, interval: float) -> int:
+    global _last_eviction
+    with _eviction_lock:
+        if time.time() - _last_eviction < interval:
+            return 0
+        _last_eviction = time.time()
+    return store.evict_idle()
@@ -0,0 +1,78 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import bulk_grade
+from bulk_grade import grade_pair, read_checkpoint, read_pairs, validate_pair
+
+def write_lines(path, lines):
+    path.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+
+def test_read_checkpoint_of_a_missing_file(tmp_path):
+    assert read_checkpoint(str(tmp_path / "graded.jsonl")) == set()
+
+def test_read_checkpoint(tmp_path):
+    path = tmp_path / "graded.jsonl"
+    write_lines(path, [json.dumps({"id": "a"}), "", json.dumps({"id": 7})])
+    assert read_checkpoint(str(path)) == {"a", "7"}
+
+# The last line cut by an interruption is removed from the file: that pair is graded again
+def test_read_checkpoint_truncates_a_cut_last_line(tmp_path):
+    path = tmp_path / "graded.jsonl"
+    path.write_text(json.dumps({"id": "a"}) + "\n" + '{"id": "b", "feedb', encoding="utf-8")
+    assert read_checkpoint(str(path)) == {"a"}
+    assert path.read_text(encoding="utf-8") == json.dumps({"id": "a"}) + "\n"
+
+def test_read_checkpoint_of_a_single_cut_line(tmp_path):
+    path = tmp_path / "graded.jsonl"
+    path.write_text('{"id": "a", "feed', encoding="utf-8")
+    assert read_checkpoint(str(path)) == set()
+    assert path.read_text(encoding="utf-8") == ""
+
+def test_read_pairs(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    write_lines(path, [
+        json.dumps({"id": "q1", "question": "Q1", "answer": "A1"}),
+        "",
+        json.dumps({"question": "Q2", "answer": "A2"}),
+        json.dumps({"id": 5, "question": "Q3"}),
+    ])
+    assert list(read_pairs(str(path))) == [("q1", "Q1", "A1", ""), ("3", "Q2", "A2", ""), ("5", "Q3", "", "")]
+
+# A malformed line gets its line number as id and an error, the lines after it are still read
+def test_read_pairs_reports_the_malformed_lines(tmp_path):
+    path = tmp_path / "answers.jsonl"
+    write_lines(path, [
+        '{"id": "q1", "question": "Q1", "answer": "A1"',
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"id": "q3", "question": "Q3", "answer": 42}),
+        json.dumps({"id": "q4", "question": "Q4", "answer": "A4"}),
+    ])
+    pairs = list(read_pairs(str(path)))
+    assert [pair[0] for pair in pairs] == ["1", "2", "3", "q4"]
+    assert pairs[0][3].startswith("Line 1 cannot be read: invalid JSON")
+    assert pairs[1][3] == "Line 2 cannot be read: not an object with a question and an answer."
+    assert pairs[2][3] == "Line 3 cannot be read: not an object with a question and an answer."
+    assert pairs[3] == ("q4", "Q4", "A4", "")
+
+def test_validate_pair():
+    assert validate_pair(" ", "An answer") == "The question is empty."
+    assert validate_pair("Q", " ") == "The answer is empty."
+    assert validate_pair("Q", "x" * (bulk_grade.answer_max_length + 1)).startswith("The answer is too long")
+    assert validate_pair("Q", "I led the migration of our billing service.") == ""
+
+@pytest.fixture
+def args():
+    return SimpleNamespace(precheck=True, model="gpt-4o-mini", max_wait=0)
+
+# The pairs that cannot be graded get an error result without any request
+def test_grade_pair_without_request(args, monkeypatch, capsys):
+    monkeypatch.setattr(bulk_grade, "request_feedback", lambda *request: pytest.fail("no request expected"))
+    assert grade_pair("2", "", "", args, "Line 2 cannot be read: invalid JSON.") == \
+        {"id": "2", "question": "", "answer": "", "error": "Line 2 cannot be read: invalid JSON."}
+    assert "Line 2 cannot be read" in capsys.readouterr().err
+    assert grade_pair("3", "Q", "", args)["error"] == "The answer is empty."
+    result = grade_pair("4", "Q", "I do not know", args)
+    assert result["graded_by"] == "precheck"
+    assert not result["feedback"]["answer_is_valid"]
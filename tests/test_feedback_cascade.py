@@ -0,0 +1,67 @@
+import pytest
+
+from feedback_cascade import REPETITIVE_GUIDANCE, TOO_SHORT_GUIDANCE, invalid_answer_feedback, precheck_answer
+
+MIN_WORDS = 5
+MIN_UNIQUE_WORD_RATIO = 0.3
+
+ANSWER = ("I led the migration of our billing service to a new database. I planned it in three steps, "
+    "tested each one on a copy of the production data, and we cut the incidents by half.")
+
+def precheck(answer: str) -> str:
+    return precheck_answer(answer, MIN_WORDS, MIN_UNIQUE_WORD_RATIO)
+
+def test_valid_answer():
+    assert precheck(ANSWER) == ""
+
+@pytest.mark.parametrize("answer", ["", "   ", "I do not know", "12345 67890 1111", "Yes. No. Maybe!"])
+def test_too_short(answer):
+    assert precheck(answer) == TOO_SHORT_GUIDANCE
+
+def test_minimum_word_count():
+    assert precheck("one two three four") == TOO_SHORT_GUIDANCE
+    assert precheck("I fixed the slow query") == ""
+
+def test_same_word_over_and_over():
+    assert precheck("good " * 20) == REPETITIVE_GUIDANCE
+    assert precheck("very good answer " * 4) == REPETITIVE_GUIDANCE
+    assert precheck("good good good good") == TOO_SHORT_GUIDANCE
+
+# A key held down is rejected: a run of 10 or more of the same letter, or runs of any character making up most of the answer
+@pytest.mark.parametrize("answer", [
+    ANSWER + " aaaaaaaaaa",
+    ANSWER + " Zzzzzzzzzzz",
+    "I think that it is !!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!",
+    "my answer to this is 1111111111111111111111111111111111111111111111111111111111111111111111111111",
+])
+def test_key_held_down(answer):
+    assert precheck(answer) == REPETITIVE_GUIDANCE
+
+# Separators and numbers in a normal answer are not a key held down
+@pytest.mark.parametrize("answer", [
+    ANSWER + "\n----------\nThe result: the error rate went from 1% to 0.1%.",
+    ANSWER + " We processed 10000000000 events per day.",
+    ANSWER + " ==========",
+    ANSWER + " aaaaaaaaa",      # 9 letters: below the run length
+])
+def test_runs_in_a_normal_answer(answer):
+    assert precheck(answer) == ""
+
+# The scripts without spaces between the words: the characters are counted, and the answer goes on to the model
+@pytest.mark.parametrize("answer", [
+    "我在上一家公司负责支付系统的数据库迁移, 我们把故障减少了一半. " * 20,
+    "私はチームのリーダーとして、プロジェクトを三か月で成功させました。" * 10,
+    "ผมเป็นหัวหน้าทีมพัฒนาระบบชำระเงิน",
+    "I used 缓存 to cut the latency",
+])
+def test_unspaced_scripts_are_not_too_short(answer):
+    assert precheck(answer) == ""
+
+def test_unspaced_scripts_too_short():
+    assert precheck("我不知道") == TOO_SHORT_GUIDANCE
+
+def test_invalid_answer_feedback():
+    feedback = invalid_answer_feedback(TOO_SHORT_GUIDANCE)
+    assert not feedback.answer_is_valid
+    assert feedback.guidance == TOO_SHORT_GUIDANCE
+    assert feedback.strengths == feedback.improvements == []
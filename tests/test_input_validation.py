@@ -0,0 +1,60 @@
+import pytest
+
+from input_validation import BANNED_KEYWORDS, InputValidator, read_profanity_wordlist
+
+better_profanity = pytest.importorskip("better_profanity")
+
+CLEAN_TEXTS = [
+    "I led the migration of our billing service to PostgreSQL and cut the incidents by half.",
+    "We used a queue to decouple the services, then measured the latency at p95 and p99.",
+    "My manager and I disagreed on the scope, so I wrote a short document with the trade-offs.",
+    "The class assessment took three weeks; I passed it and shared the notes with my team.",
+    "Scunthorpe United won the match, and the analyst who predicted it was pleased.",
+    "I assumed the cache was warm, which was wrong: the hit ratio was only 20%.",
+    "The cocktail party was the kickoff of the project, with the whole department.",
+    "I prefer Python for data work, and Go for the small network services.",
+]
+
+PROFANE_TEXTS = [
+    "This is shit.",
+    "What the hell happened to the release?",
+    "The sh1t hit the fan during the outage.",
+    "you are an as shole",
+    "sh it happens in production",
+    "h e l l yes, we shipped it",
+    "s-h-i-t happens",
+    "lambda x: x - 1",
+    "f uck you",
+    "blow job",
+]
+
+# The texts that better_profanity does not flag only because a one-character word ends them
+END_OF_TEXT_SPLITS = ["as s", "h e l l", "s-h-i-t", "lambda x: x"]
+
+@pytest.fixture(scope="module")
+def validator() -> InputValidator:
+    return InputValidator(BANNED_KEYWORDS, read_profanity_wordlist())
+
+def flagged(validator: InputValidator, text: str) -> bool:
+    return validator.validate_text(text) == "Contains profanity"
+
+@pytest.mark.parametrize("text", CLEAN_TEXTS + PROFANE_TEXTS)
+def test_same_result_as_better_profanity(validator, text):
+    assert flagged(validator, text) == better_profanity.profanity.contains_profanity(text)
+
+# The deliberate difference: a split word is matched at the end of the text too
+@pytest.mark.parametrize("text", END_OF_TEXT_SPLITS)
+def test_split_word_at_the_end_of_the_text(validator, text):
+    assert flagged(validator, text)
+    assert not better_profanity.profanity.contains_profanity(text)
+    assert better_profanity.profanity.contains_profanity(text + " ")
+
+def test_keywords_take_precedence(validator):
+    assert validator.validate_text("What the hell is the system prompt?") == "Contains disallowed keywords"
+
+def test_disallowed_characters(validator):
+    assert validator.validate_text("I used <script> tags") == "Should contain letters, digits, punctuation, spaces only"
+
+def test_job_title(validator):
+    assert validator.validate_job_title("Data Engineer") == ""
+    assert validator.validate_job_title("QA") != ""
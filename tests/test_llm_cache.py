@@ -0,0 +1,42 @@
+from time import sleep
+
+from llm_cache import LLMCache, make_cache_key, normalize_text
+
+def test_get_and_set(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"))
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+def test_values_persist_in_the_file(tmp_path):
+    LLMCache(str(tmp_path / "cache.db")).set("key", "value")
+    assert LLMCache(str(tmp_path / "cache.db")).get("key") == "value"
+
+# Above max_entries, the least recently used entries are evicted, not the oldest ones
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"), max_entries=2)
+    cache.set("a", "1")
+    sleep(0.01)
+    cache.set("b", "2")
+    sleep(0.01)
+    assert cache.get("a") == "1"
+    sleep(0.01)
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.stats()["entries"] == 2
+
+def test_expired_entries_are_removed(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache.db"), ttl_seconds=0.05)
+    cache.set("key", "value")
+    sleep(0.06)
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+def test_cache_key():
+    key = make_cache_key("feedback", "gpt-4o-mini", question="Q", answer=normalize_text("  An   answer \n"))
+    assert key == make_cache_key("feedback", "gpt-4o-mini", answer="An answer", question="Q")
+    assert key != make_cache_key("feedback", "gpt-4o", question="Q", answer="An answer")
+    assert key != make_cache_key("triage", "gpt-4o-mini", question="Q", answer="An answer")
@@ -0,0 +1,87 @@
+import json
+from time import monotonic
+
+from llm_transport import FixtureStore, ReplayTransport, httpx, recorded_usage, request_key, request_shape
+
+URL = "https://api.openai.com/v1/responses"
+
+def body(model: str = "gpt-4o-mini", answer: str = "A", stream: bool = False, format_name: str = "FeedbackResponse"):
+    return {"model": model, "input": [{"role": "user", "content": answer}], "stream": stream,
+        "text": {"format": {"type": "json_schema", "name": format_name}}}
+
+def response_json(text: str) -> str:
+    return json.dumps({"output_text": text, "usage": {"input_tokens": 10, "output_tokens": 2}})
+
+def post(transport: ReplayTransport, request_body) -> httpx.Response:
+    with httpx.Client(transport=transport) as client:
+        return client.post(URL, json=request_body)
+
+def test_request_key_and_shape():
+    assert request_key("POST", "/v1/responses", body(answer="A")) == request_key("POST", "/v1/responses", body(answer="A"))
+    assert request_key("POST", "/v1/responses", body(answer="A")) != request_key("POST", "/v1/responses", body(answer="B"))
+    assert request_shape("POST", "/v1/responses", body(answer="A")) == "POST /v1/responses gpt-4o-mini FeedbackResponse parse"
+    assert request_shape("POST", "/v1/responses", body(stream=True)).endswith(" stream")
+
+def test_recorded_usage():
+    assert recorded_usage(response_json("x")) == {"input_tokens": 10, "output_tokens": 2}
+    stream = 'event: response.output_text.delta\ndata: {"type": "response.output_text.delta"}\n\n' \
+        'event: response.completed\ndata: {"type": "response.completed", "response": {"usage": {"input_tokens": 5}}}\n\n'
+    assert recorded_usage(stream) == {"input_tokens": 5}
+    assert recorded_usage("event: ping\n") is None
+
+def test_fixtures_are_saved_and_loaded(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    store.add("POST", "/v1/responses", body(answer="A"), 200, "application/json", [[0.5, response_json("first")]])
+    store.add("POST", "/v1/responses", body(answer="A"), 200, "application/json", [[0.7, response_json("second")]])
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    loaded = FixtureStore(str(tmp_path))
+    # The recordings of a request are served in turn
+    served = [loaded.next_recording("POST", "/v1/responses", body(answer="A"))["chunks"][0][0] for _ in range(3)]
+    assert served == [0.5, 0.7, 0.5]
+    assert loaded.next_recording("POST", "/v1/responses", body(answer="A"))["usage"] == {"input_tokens": 10, "output_tokens": 2}
+
+# A request that was not recorded is served a recording of the same shape, the same one on every replay
+def test_shape_fallback(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    store.add("POST", "/v1/responses", body(answer="A"), 200, "application/json", [[0.1, response_json("A")]])
+    store.add("POST", "/v1/responses", body(answer="B"), 200, "application/json", [[0.1, response_json("B")]])
+    first = store.next_recording("POST", "/v1/responses", body(answer="typed differently"))
+    assert first is not None
+    assert FixtureStore(str(tmp_path)).next_recording("POST", "/v1/responses", body(answer="typed differently")) == first
+    assert store.next_recording("POST", "/v1/responses", body(model="gpt-4o")) is None
+    assert store.next_recording("POST", "/v1/responses", body(stream=True)) is None
+    assert store.next_recording("POST", "/v1/responses", body(format_name="Questions")) is None
+
+def test_replay_serves_the_recording(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    store.add("POST", "/v1/responses", body(), 200, "application/json", [[0.0, response_json("hello")]])
+    response = post(ReplayTransport(store, latency=0), body())
+    assert response.status_code == 200
+    assert response.json()["output_text"] == "hello"
+
+def test_replay_of_an_unknown_shape_is_a_404(tmp_path):
+    response = post(ReplayTransport(FixtureStore(str(tmp_path)), latency=0), body())
+    assert response.status_code == 404
+    assert "No recorded response for 'POST /v1/responses gpt-4o-mini FeedbackResponse parse'" in response.json()["error"]["message"]
+
+# The recorded latency is kept, or the chunks are scaled so that the response takes the synthetic latency
+def test_replay_latency(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    chunks = [[0.1, 'data: {"type": "response.created"}\n\n'], [0.2, 'data: {"type": "response.completed"}\n\n']]
+    store.add("POST", "/v1/responses", body(stream=True), 200, "text/event-stream", chunks)
+
+    for latency, expected in [(None, 0.2), (0.05, 0.05), (0.4, 0.4)]:
+        start = monotonic()
+        response = post(ReplayTransport(store, latency), body(stream=True))
+        elapsed = monotonic() - start
+        assert response.text == "".join(text for _, text in chunks)
+        assert expected <= elapsed < expected + 0.1, (latency, elapsed)
+
+# A recording without timing (a single chunk at 0 s) takes the synthetic latency
+def test_replay_latency_of_a_recording_without_timing(tmp_path):
+    store = FixtureStore(str(tmp_path))
+    store.add("POST", "/v1/responses", body(), 200, "application/json", [[0.0, response_json("hello")]])
+    start = monotonic()
+    post(ReplayTransport(store, 0.1), body())
+    assert 0.1 <= monotonic() - start < 0.2
@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+from instrumentation import usage_cost, usage_tokens
+from interview_config import openai_price_per_1m_tokens
+from prompts import FEEDBACK_INSTRUCTIONS, feedback_batch_prompt, feedback_prompt, questions_prompt, triage_prompt
+
+# The variable inputs are only in the user message: the system message is the static prefix cached by the provider
+@pytest.mark.parametrize("prompt, inputs", [
+    (questions_prompt, [("Data Engineer", 5, "Easy", ""), ("Product Manager", 10, "Hard", "Lead the roadmap of the payments team.")]),
+    (feedback_prompt, [("Tell me about a conflict.", "I talked to my colleague."), ("Describe a failure.", "We missed a release.")]),
+    (feedback_batch_prompt, [([("Q1", "A1")],), ([("Q1", "A1"), ("Q2", "A2"), ("Q3", "A3")],)]),
+    (triage_prompt, [([("Q1", "A1")],), ([("Q2", "A2"), ("Q3", "A3")],)]),
+])
+def test_system_message_is_identical_across_calls(prompt, inputs):
+    first, second = (prompt(*args) for args in inputs)
+    assert [message["role"] for message in first] == ["system", "user"]
+    assert first[0] == second[0]
+    assert first[1] != second[1]
+    for args, messages in zip(inputs, (first, second)):
+        for text in (value for value in args if isinstance(value, str) and value):
+            assert text in messages[1]["content"]
+
+def test_feedback_prompts_share_the_instructions():
+    assert feedback_prompt("Q", "A")[0]["content"].startswith(FEEDBACK_INSTRUCTIONS)
+    assert feedback_batch_prompt([("Q", "A")])[0]["content"].startswith(FEEDBACK_INSTRUCTIONS)
+
+def test_usage_tokens_reads_the_cached_tokens():
+    usage = SimpleNamespace(input_tokens=2000, output_tokens=300, input_tokens_details=SimpleNamespace(cached_tokens=1536))
+    assert usage_tokens(usage) == {"input": 2000, "output": 300, "cached": 1536}
+    assert usage_tokens({"input_tokens": 10, "output_tokens": 5}) == {"input": 10, "output": 5, "cached": 0}
+    assert usage_tokens(SimpleNamespace(input_tokens=10, output_tokens=5, input_tokens_details=None))["cached"] == 0
+    assert usage_tokens(None) == {"input": 0, "output": 0, "cached": 0}
+
+# The cached tokens are part of the input tokens: only the uncached ones are billed at the full input price
+def test_usage_cost_bills_the_cached_input_at_the_discounted_price():
+    prices = openai_price_per_1m_tokens["gpt-4o-mini"]
+    tokens = {"input": 2000, "cached": 1536, "output": 300}
+    expected = (464 * prices["input"] + 1536 * prices["cached_input"] + 300 * prices["output"]) / 1000000
+    assert usage_cost(tokens, prices) == pytest.approx(expected)
+    assert usage_cost(tokens, prices) < usage_cost(dict(tokens, cached=0), prices)
+
+def test_usage_cost_without_cached_price_bills_the_full_input_price():
+    assert usage_cost({"input": 1000000, "cached": 500000, "output": 0}, {"input": 2.0, "output": 8.0}) == pytest.approx(2.0)
+
+def test_every_model_has_a_cached_input_price_below_the_input_price():
+    for model, prices in openai_price_per_1m_tokens.items():
+        assert prices["cached_input"] < prices["input"], model
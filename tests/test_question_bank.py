@@ -0,0 +1,50 @@
+from question_bank import MinHasher, NearDuplicateIndex, QuestionBank, normalize_job_title, question_split
+
+def test_question_split():
+    assert question_split(5) == {"behavioral": 2, "technical": 3}
+    assert question_split(10) == {"behavioral": 4, "technical": 6}
+    assert question_split(1) == {"behavioral": 0, "technical": 1}
+
+def test_normalize_job_title():
+    assert normalize_job_title("  Data   Engineer ") == "data engineer"
+
+def test_minhash_ignores_case_punctuation_and_spaces():
+    hasher = MinHasher()
+    assert hasher.signature("How do you design a cache?") == hasher.signature("how do   you design a CACHE")
+    assert hasher.signature("How do you design a cache?") != hasher.signature("Tell me about a conflict in your team.")
+    assert hasher.shingles("abc") == {"abc"}
+
+def test_near_duplicates_are_rejected():
+    index = NearDuplicateIndex(threshold=0.6)
+    assert index.add("Describe a time you had to resolve a conflict within your team.")
+    assert not index.add("Describe a time when you had to resolve a conflict within your team?")
+    assert index.add("How would you design a rate limiter for a public API?")
+    assert index.add("Explain the difference between optimistic and pessimistic locking.")
+    assert not index.add("Explain the difference between pessimistic and optimistic locking.")
+    assert len(index.signatures) == 3
+
+def test_sample_keeps_the_split_with_behavioral_first(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.db"))
+    bank.add("Data Engineer", "Medium", "behavioral", [f"B{i}" for i in range(5)])
+    bank.add("data engineer", "Medium", "technical", [f"T{i}" for i in range(3)])
+    bank.add("Data Engineer", "Medium", "technical", ["T3", "T4"])    # Appended after the first ones
+    assert bank.pool_size("Data Engineer", "Medium", "technical") == 5
+    assert bank.pool("Data Engineer", "Medium", "technical") == ["T0", "T1", "T2", "T3", "T4"]
+
+    for _ in range(20):
+        questions = bank.sample(" Data  Engineer", "Medium", 5)
+        assert len(questions) == len(set(questions)) == 5
+        assert all(q.startswith("B") for q in questions[:2])
+        assert all(q.startswith("T") for q in questions[2:])
+
+def test_sample_of_a_missing_or_too_small_pool(tmp_path):
+    bank = QuestionBank(str(tmp_path / "bank.db"))
+    bank.add("Data Engineer", "Medium", "behavioral", ["B0", "B1"])
+    bank.add("Data Engineer", "Medium", "technical", ["T0", "T1"])
+    assert bank.sample("Data Engineer", "Medium", 5) is None      # 3 technical questions needed
+    assert bank.sample("Data Engineer", "Hard", 2) is None
+    assert bank.sample("Product Manager", "Medium", 2) is None
+    questions = bank.sample("Data Engineer", "Medium", 3)      # 1 behavioral, 2 technical
+    assert questions[0] in ("B0", "B1")
+    assert sorted(questions[1:]) == ["T0", "T1"]
+    assert bank.stats() == [("data engineer", "Medium", "behavioral", 2), ("data engineer", "Medium", "technical", 2)]
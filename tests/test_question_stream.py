@@ -0,0 +1,41 @@
+import json
+
+from question_stream import QuestionStreamParser
+
+QUESTIONS = ["Tell me about a \"difficult\" project.", "How do you review code?\nGive an example.", "What is a B-tree [index]?"]
+
+def feed_all(parser: QuestionStreamParser, deltas):
+    questions = []
+    for delta in deltas:
+        questions.extend(parser.feed(delta))
+    return questions
+
+def test_whole_text():
+    text = json.dumps({"questions": QUESTIONS})
+    assert feed_all(QuestionStreamParser(), [text]) == QUESTIONS
+
+# Each question is returned by the delta that closes its string, whatever the split of the deltas
+def test_character_by_character():
+    text = json.dumps({"questions": QUESTIONS})
+    parser = QuestionStreamParser()
+    completed = [parser.feed(char) for char in text]
+    assert [question for questions in completed for question in questions] == QUESTIONS
+    assert all(len(questions) <= 1 for questions in completed)
+    assert parser.done
+
+def test_question_is_returned_when_its_string_closes():
+    parser = QuestionStreamParser()
+    assert parser.feed('{"questions": ["First ques') == []
+    assert parser.feed('tion", "Sec') == ["First question"]
+    assert parser.feed('ond"') == ["Second"]
+    assert not parser.done
+    assert parser.feed("]}") == []
+    assert parser.done
+
+def test_escaped_quote_split_across_deltas():
+    parser = QuestionStreamParser()
+    assert feed_all(parser, ['{"questions": ["Say \\', '"hi\\', '" to', ' me"]}']) == ['Say "hi" to me']
+
+def test_text_before_the_array_and_after_it_is_ignored():
+    parser = QuestionStreamParser()
+    assert feed_all(parser, ['{"note": "x", "quest', 'ions" :  ["Q1"], "other": ["not a question"]}']) == ["Q1"]
@@ -0,0 +1,78 @@
+import threading
+from time import monotonic, sleep
+
+import pytest
+
+from rate_limiter import DeadlineExceededError, FairScheduler, TokenBucket, estimate_request_tokens
+
+def wait_until(condition, timeout: float = 2.0):
+    end = monotonic() + timeout
+    while not condition():
+        assert monotonic() < end, "timed out"
+        sleep(0.005)
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60)    # 1 per second
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1, abs=0.05)
+    assert bucket.wait_time(1000) == pytest.approx(60, abs=0.05)     # Capped at the capacity
+
+def test_estimate_request_tokens():
+    assert estimate_request_tokens([{"role": "system", "content": "x" * 400}, {"role": "user", "content": "y" * 40}], 100) == 210
+    assert estimate_request_tokens("z" * 8, None) == 2
+
+def test_acquire_without_waiting():
+    scheduler = FairScheduler({}, {"rpm": 60, "tpm": 10000})
+    assert scheduler.acquire("a", "model", 100) < 0.05
+    assert scheduler.waiting_requests() == 0
+
+# A session with many waiting requests gets one request in turn with the other sessions
+def test_sessions_are_served_round_robin():
+    scheduler = FairScheduler({}, {"rpm": 1, "tpm": 100000})
+    scheduler.acquire("blocker", "model", 1)     # Empties the requests bucket: the requests below wait in the queue
+    order, lock = [], threading.Lock()
+
+    def request(session_id: str):
+        scheduler.acquire(session_id, "model", 1)
+        with lock:
+            order.append(session_id)
+
+    threads = []
+    for session_id in ["busy", "busy", "busy", "other"]:
+        threads.append(threading.Thread(target=request, args=(session_id,), daemon=True))
+        threads[-1].start()
+        wait_until(lambda: scheduler.waiting_requests() == len(threads))
+    assert scheduler.queue_position("busy") == 1
+    assert scheduler.queue_position("other") == 2
+    assert scheduler.waiting_requests("busy") == 3
+
+    with scheduler.condition:
+        scheduler.buckets["model"][0].__init__(6000)    # Raise the limit: the waiting requests are sent in their queue order
+        scheduler.condition.notify_all()
+    for thread in threads:
+        thread.join(2)
+    assert order == ["busy", "other", "busy", "busy"]
+
+# A request still waiting at its deadline raises and leaves the queue, so it does not block the requests behind it
+def test_acquire_deadline_leaves_the_queue():
+    scheduler = FairScheduler({}, {"rpm": 1, "tpm": 100000})
+    scheduler.acquire("a", "model", 1)
+    start = monotonic()
+    with pytest.raises(DeadlineExceededError):
+        scheduler.acquire("b", "model", 1, deadline_at=monotonic() + 0.1)
+    assert 0.1 <= monotonic() - start < 1
+    assert scheduler.waiting_requests() == 0
+    assert scheduler.queue_position("b") is None
+
+def test_acquire_past_deadline_raises_at_once():
+    scheduler = FairScheduler({}, {"rpm": 60, "tpm": 10000})
+    with pytest.raises(DeadlineExceededError):
+        scheduler.acquire("a", "model", 1, deadline_at=monotonic() - 1)
+    assert scheduler.waiting_requests() == 0
+
+def test_complete_corrects_the_tokens_bucket():
+    scheduler = FairScheduler({"model": {"rpm": 100, "tpm": 1000}}, {"rpm": 1, "tpm": 1})
+    scheduler.acquire("a", "model", 100)
+    scheduler.complete("model", 100, 600)
+    assert scheduler.buckets["model"][1].level == pytest.approx(400, abs=1)
@@ -0,0 +1,159 @@
+import threading
+from time import monotonic, sleep
+
+import pytest
+
+from rate_limiter import DeadlineExceededError, FairScheduler, QueueDeadlineError
+from resilience import CircuitBreaker, CircuitOpenError, ResilientCaller, deadline_call, time_left
+
+class ServerError(Exception):
+    status_code = 503
+
+def test_circuit_opens_after_the_failure_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    assert not breaker.record_failure()
+    assert not breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    assert breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    assert not breaker.record_failure()
+    assert breaker.state == "closed"
+
+# Half-open: a single probe is let through, its outcome closes or reopens the circuit
+def test_half_open_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    sleep(0.06)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+def test_released_probe_lets_the_next_request_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    sleep(0.02)
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
+
+def test_time_left():
+    assert 0.9 < time_left(monotonic() + 1) <= 1
+    with pytest.raises(QueueDeadlineError):
+        time_left(monotonic())
+
+# A request still running at the deadline raises at the deadline, and its late result is still counted
+def test_deadline_call_counts_the_late_result():
+    extra = []
+    start = monotonic()
+    with pytest.raises(DeadlineExceededError):
+        deadline_call(lambda deadline_at: sleep(0.2) or "late", monotonic() + 0.05, None, lambda: None, extra.append)
+    assert monotonic() - start < 0.15
+    sleep(0.25)
+    assert extra == ["late"]
+
+def test_deadline_call_counts_the_hedge_loser():
+    calls, extra, hedges = [], [], []
+    lock = threading.Lock()
+
+    def attempt(deadline_at):
+        with lock:
+            calls.append(len(calls))
+            delay = 0.2 if len(calls) == 1 else 0.01
+        sleep(delay)
+        return f"attempt {delay}"
+
+    result = deadline_call(attempt, monotonic() + 1, 0.02, lambda: hedges.append(1), extra.append)
+    assert result == "attempt 0.01"
+    assert hedges == [1]
+    sleep(0.3)
+    assert extra == ["attempt 0.2"]
+
+def test_call_retries_the_retryable_errors():
+    caller = ResilientCaller(max_retries=2, backoff_base=0.001, backoff_cap=0.001, failure_threshold=5, reset_timeout=60)
+    attempts, events = [], []
+
+    def attempt(deadline_at):
+        attempts.append(deadline_at)
+        if len(attempts) < 3:
+            raise ServerError()
+        return "ok"
+
+    assert caller.call("op", "model", attempt, deadline=1, on_event=events.append) == "ok"
+    assert len(attempts) == 3
+    assert len(set(attempts)) == 1     # The deadline covers all the attempts
+    assert events == ["retry", "retry"]
+    assert caller.circuit_states() == {"model": "closed"}
+
+def test_call_does_not_retry_the_other_errors():
+    caller = ResilientCaller(max_retries=2, backoff_base=0.001, backoff_cap=0.001, failure_threshold=1, reset_timeout=60)
+    attempts = []
+
+    def attempt(deadline_at):
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        caller.call("op", "model", attempt, deadline=1)
+    assert len(attempts) == 1
+    assert caller.circuit_states() == {"model": "closed"}
+
+def test_open_circuit_fails_at_once():
+    caller = ResilientCaller(max_retries=0, backoff_base=0.001, backoff_cap=0.001, failure_threshold=1, reset_timeout=60)
+    events = []
+    with pytest.raises(ServerError):
+        caller.call("op", "model", lambda deadline_at: (_ for _ in ()).throw(ServerError()), deadline=1, on_event=events.append)
+    assert events == ["circuit_open"]
+    with pytest.raises(CircuitOpenError):
+        caller.call("op", "model", lambda deadline_at: "ok", deadline=1)
+
+def test_extra_results_are_taken_per_session():
+    caller = ResilientCaller(0, 0.001, 0.001, 1, 60)
+    caller.add_extra_result("a", "op", 1)
+    caller.add_extra_result("b", "op", 2)
+    assert caller.take_extra_results("a") == [("op", 1)]
+    assert caller.take_extra_results("a") == []
+    assert caller.take_extra_results("b") == [("op", 2)]
+
+# A request timing out in the local queue never reached the provider: the circuit stays closed
+def test_queue_timeout_leaves_the_circuit_closed():
+    scheduler = FairScheduler({}, {"rpm": 1, "tpm": 100000})
+    scheduler.acquire("other", "m", 1)      # Empties the requests bucket
+    caller = ResilientCaller(max_retries=2, backoff_base=0.001, backoff_cap=0.001, failure_threshold=1, reset_timeout=60)
+    events = []
+
+    def attempt(deadline_at):
+        scheduler.acquire("session", "m", 1, deadline_at)
+        return "ok"
+
+    with pytest.raises(QueueDeadlineError):
+        caller.call("op", "m", attempt, deadline=0.1, on_event=events.append)
+    assert caller.circuit_states() == {"m": "closed"}
+    assert events == ["deadline"]
+    assert scheduler.waiting_requests() == 0
+
+def test_deadline_before_sending_leaves_the_circuit_closed():
+    caller = ResilientCaller(max_retries=0, backoff_base=0.001, backoff_cap=0.001, failure_threshold=1, reset_timeout=60)
+    with pytest.raises(QueueDeadlineError):
+        caller.call("op", "m", lambda deadline_at: time_left(deadline_at - 1), deadline=1)    # No time left once out of the queue
+    assert caller.circuit_states() == {"m": "closed"}
+
+# A request sent to the provider and still running at the deadline is a provider failure
+def test_sent_request_timeout_opens_the_circuit():
+    caller = ResilientCaller(max_retries=0, backoff_base=0.001, backoff_cap=0.001, failure_threshold=1, reset_timeout=60)
+    with pytest.raises(DeadlineExceededError) as error:
+        caller.call("op", "m", lambda deadline_at: sleep(0.2), deadline=0.05)
+    assert not isinstance(error.value, QueueDeadlineError)
+    assert caller.circuit_states() == {"m": "open"}
@@ -0,0 +1,78 @@
+from time import sleep
+
+import pytest
+
+from session_store import (MemorySessionStore, SessionStore, SQLiteSessionStore, TieredSessionStore, decode_state,
+    encode_state, get_session_store)
+
+STATE = {"step": 2, "questions": ["Q1", "Q2"], "answers": ["Réponse", ""], "finished": False}
+
+@pytest.fixture(params=["memory", "sqlite", "tiered"])
+def store(request, tmp_path) -> SessionStore:
+    path = str(tmp_path / "sessions.db")
+    if request.param == "memory":
+        return MemorySessionStore(10, 60)
+    if request.param == "sqlite":
+        return SQLiteSessionStore(path, 60)
+    return TieredSessionStore(MemorySessionStore(10, 60), SQLiteSessionStore(path, 60))
+
+def test_encode_decode():
+    assert decode_state(encode_state(STATE)) == STATE
+
+def test_save_get_delete(store):
+    size = store.save("token", STATE)
+    assert decode_state(store.get("token")) == STATE
+    assert store.stats() == (1, size)
+    store.delete("token")
+    assert store.get("token") is None
+    assert store.stats() == (0, 0)
+
+def test_update(store):
+    store.save("token", STATE)
+    store.update("token", lambda state: dict(state, step=3))
+    assert decode_state(store.get("token"))["step"] == 3
+    store.update("token", lambda state: None)
+    assert decode_state(store.get("token"))["step"] == 3
+    store.update("unknown", lambda state: pytest.fail("not called for an unknown session"))
+    assert store.get("unknown") is None
+
+def test_session_store_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStore()
+
+# Above max_sessions, the least recently used session is dropped from memory
+def test_memory_store_evicts_the_least_recently_used():
+    store = MemorySessionStore(2, 60)
+    store.save("a", STATE)
+    store.save("b", STATE)
+    assert store.get("a") is not None
+    store.save("c", STATE)
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get("c") is not None
+
+def test_idle_sessions_expire(tmp_path):
+    for store in (MemorySessionStore(10, 0.05), SQLiteSessionStore(str(tmp_path / "sessions.db"), 0.05)):
+        store.save("idle", STATE)
+        sleep(0.06)
+        store.save("active", STATE)
+        assert store.get("idle") is None
+        assert store.evict_idle() <= 1
+        assert store.stats()[0] == 1
+
+# A session dropped from the memory LRU is still served by the persistent store
+def test_tiered_store_falls_back_to_the_persistent_store(tmp_path):
+    store = TieredSessionStore(MemorySessionStore(1, 60), SQLiteSessionStore(str(tmp_path / "sessions.db"), 60))
+    store.save("a", STATE)
+    store.save("b", STATE)
+    assert store.memory.get("a") is None
+    assert decode_state(store.get("a")) == STATE
+    assert store.memory.get("a") is not None
+    assert store.stats()[0] == 2
+
+def test_get_session_store(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    assert isinstance(get_session_store("tiered", path, 10, 60), TieredSessionStore)
+    assert get_session_store("tiered", path, 10, 60) is get_session_store("tiered", path, 10, 60)
+    with pytest.raises(ValueError):
+        get_session_store("redis", path, 10, 60)